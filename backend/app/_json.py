@@ -0,0 +1,30 @@
+# backend/app/_json.py
+"""
+JSON encode/decode helpers shared across the backend.
+Uses orjson when it is installed and falls back to the stdlib json module.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Decode JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Encode obj as a JSON string with sorted keys, so equal values always
+    serialise to the same text. Compact unless indent=True (2 spaces).
+    """
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode()
+    if indent:
+        return json.dumps(obj, sort_keys=True, indent=2)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
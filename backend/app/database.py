@@ -1,13 +1,115 @@
 # backend/app/database.py
 from sqlmodel import create_engine, SQLModel, Session
+from sqlalchemy.schema import CreateIndex
 import os
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from app._json import dumps, loads
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/sdrdb")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Connection pool sizing (per process): keep
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) x uvicorn workers below Postgres max_connections.
+# Behind PgBouncer in transaction mode, use a small pool (e.g. 2 and 0).
+_POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True,
+}
+
+# SQLite (local runs) keeps SQLAlchemy's default pool
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    # JSON columns are encoded/decoded with orjson when available
+    json_serializer=dumps,
+    json_deserializer=loads,
+    **({} if DATABASE_URL.startswith("sqlite") else _POOL_OPTIONS),
+)
+
+def _migrate_company_metadata_to_jsonb():
+    # lead.company_metadata used to be a TEXT column holding a JSON string;
+    # convert it in place on existing Postgres databases
+    if engine.dialect.name != "postgresql":
+        return
+    columns = {c["name"]: c for c in inspect(engine).get_columns("lead")}
+    column = columns.get("company_metadata")
+    if column is None or column["type"].__class__.__name__ == "JSONB":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE lead ALTER COLUMN company_metadata TYPE jsonb "
+            "USING NULLIF(company_metadata, '')::jsonb"
+        ))
+
+# Trigram indexes let Postgres serve the search endpoints' ILIKE '%q%'
+# filters (leading wildcard) from an index instead of a sequential scan
+_TRIGRAM_INDEXES = {
+    "ix_lead_company_trgm": "company",
+    "ix_lead_name_trgm": "name",
+    "ix_lead_title_trgm": "title",
+    "ix_lead_email_trgm": "email",
+    "ix_lead_metadata_trgm": "(company_metadata::text)",
+}
+
+def _create_trigram_indexes():
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError as e:
+        logger.warning(f"pg_trgm unavailable, search will scan: {e}")
+        return
+    for name, expression in _TRIGRAM_INDEXES.items():
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON lead USING gin ({expression} gin_trgm_ops)"
+                ))
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not create index {name}: {e}")
+
+# Names of model indexes init_db could not create in this process
+_missing_indexes = set()
+
+def index_missing(name: str) -> bool:
+    """Whether init_db failed to create the named model index (e.g. the
+    unique uq_lead_company_lower while case-variant companies remain), so
+    callers that rely on it can fall back to an explicit check until the
+    duplicates are cleaned up and the app restarted"""
+    return name in _missing_indexes
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    _migrate_company_metadata_to_jsonb()
+    # create_all skips tables that already exist, so make sure indexes added
+    # after the table was first created are present too
+    # (IF NOT EXISTS rather than checkfirst: reflection does not report
+    # expression indexes such as lower(company) on every backend)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                _missing_indexes.discard(index.name)
+            except SQLAlchemyError as e:
+                # e.g. uq_lead_company_lower over companies that differ only in
+                # case. Keep starting up: scripts/cleanup_duplicates.py removes
+                # them through the API (GET /leads/duplicates groups on the same
+                # lower(company) key) and the next start builds the index
+                _missing_indexes.add(index.name)
+                hint = " (run scripts/cleanup_duplicates.py, then restart)" if index.unique else ""
+                logger.warning(f"Could not create index {index.name}{hint}: {e}")
+    _create_trigram_indexes()
+    # Superseded by ix_activity_lead_created, whose leading column is lead_id
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_activitylog_lead_id"))
 
 def get_session():
     with Session(engine) as session:
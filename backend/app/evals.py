@@ -2,46 +2,72 @@
 """
 Simple evaluation harness for prompt engineering.
 Runs test cases (in evals/cases.json) vs Grok, collects metrics.
+Cases are sent to Grok concurrently (bounded by EVAL_CONCURRENCY).
 """
-import os, json
-from app.grok_client import call_grok, GrokError
+import os
+import asyncio
+import httpx
+from app.grok_client import call_grok_async, extract_json, GrokError
 from app.prompts import qualification_prompt
+from app._json import loads, dumps
 from typing import List, Dict
 from statistics import mean
 
 EVAL_CASES_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "evals", "cases.json")
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "16"))
+
+# Parsed cases, reused across runs until cases.json changes on disk
+_cases_cache = {"mtime": None, "cases": None}
 
 def load_cases():
-    with open(EVAL_CASES_PATH, "r") as f:
-        return json.load(f)
+    mtime = os.path.getmtime(EVAL_CASES_PATH)
+    if _cases_cache["mtime"] != mtime:
+        with open(EVAL_CASES_PATH, "rb") as f:
+            _cases_cache["cases"] = loads(f.read())
+        _cases_cache["mtime"] = mtime
+    return _cases_cache["cases"]
 
-def run_evals():
-    cases = load_cases()
+def _write_results(out_path: str, overall: Dict) -> None:
+    with open(out_path, "w") as f:
+        f.write(dumps(overall, indent=True))
+
+async def _run_case(client: httpx.AsyncClient, sem: asyncio.Semaphore, c: Dict) -> Dict:
+    prompt = qualification_prompt(c["lead"], c.get("weights", {}))
+    try:
+        async with sem:
+            resp = await call_grok_async(client, prompt)
+        # parse json
+        parsed = extract_json(resp["text"]) or {}
+        # heuristics: check if score within tolerance of expected (if provided)
+        expected = c.get("expected_score")
+        ok = None
+        if expected is not None:
+            ok = abs(parsed.get("score", 0) - expected) <= c.get("tol", 15)
+        return {"case_id": c.get("id"), "ok": ok, "parsed": parsed, "expected": expected}
+    except GrokError as e:
+        return {"case_id": c.get("id"), "ok": False, "error": str(e)}
+
+async def run_evals_async():
+    # file I/O runs in a worker thread so it never blocks the event loop
+    cases = await asyncio.to_thread(load_cases)
+    sem = asyncio.Semaphore(EVAL_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=30) as client:
+        outcomes = await asyncio.gather(
+            *[_run_case(client, sem, c) for c in cases], return_exceptions=True
+        )
     results = []
-    for c in cases:
-        prompt = qualification_prompt(c["lead"], c.get("weights", {}))
-        try:
-            resp = call_grok(prompt)
-            text = resp["text"]
-            # parse json
-            import re
-            m = re.search(r"(\{.*\})", text, re.S)
-            parsed = {}
-            if m:
-                parsed = json.loads(m.group(1))
-            # heuristics: check if score within tolerance of expected (if provided)
-            expected = c.get("expected_score")
-            ok = None
-            if expected is not None:
-                ok = abs(parsed.get("score", 0) - expected) <= c.get("tol", 15)
-            results.append({"case_id": c.get("id"), "ok": ok, "parsed": parsed, "expected": expected})
-        except GrokError as e:
-            results.append({"case_id": c.get("id"), "ok": False, "error": str(e)})
+    for c, outcome in zip(cases, outcomes):
+        if isinstance(outcome, BaseException):
+            results.append({"case_id": c.get("id"), "ok": False, "error": str(outcome)})
+        else:
+            results.append(outcome)
     # summary
     successes = [r for r in results if r.get("ok")]
     overall = {"total": len(results), "ok": len(successes), "cases": results}
     # write results to file
     out_path = os.getenv("EVAL_OUTPUT", "/tmp/grok_evals.json")
-    with open(out_path, "w") as f:
-        json.dump(overall, f, indent=2)
+    await asyncio.to_thread(_write_results, out_path, overall)
     return overall
+
+def run_evals():
+    return asyncio.run(run_evals_async())
@@ -1,8 +1,12 @@
  # backend/app/grok_client.py
 import os
-import requests
+import asyncio
+import hashlib
+import tempfile
+import httpx
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app._json import loads, dumps
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -10,60 +14,281 @@ logger = logging.getLogger(__name__)
 
 GROK_API_KEY = os.getenv("GROK_API_KEY", "")
 GROK_API_URL = os.getenv("GROK_API_URL", "https://api.x.ai/v1/chat/completions")
+GROK_MODEL = "grok-3"
+# Max in-flight requests when fanning out many prompts at once
+GROK_CONCURRENCY = int(os.getenv("GROK_CONCURRENCY", "8"))
+
+# Optional on-disk response cache (prompts are deterministic enough at low temperature
+# that identical requests, e.g. eval reruns, can skip the network entirely)
+_CACHE_ENABLED = os.getenv("GROK_CACHE") == "1"
+_CACHE_DIR = os.getenv("GROK_CACHE_DIR", "/tmp/grok_cache")
 
 class GrokError(Exception):
     pass
 
-def call_grok(prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, Any]:
-    """
-    Call to xAI Grok API using the chat completions endpoint.
-    """
-    if not GROK_API_KEY:
-        raise GrokError("GROK_API_KEY environment variable is required")
-    
-    # Log the input prompt for debugging
-    logger.info(f"Grok API Call - Prompt Length: {len(prompt)} characters")
-    logger.info(f"Grok API Call - Prompt Preview: {prompt[:200]}...")
-    logger.info(f"Grok API Call - Max Tokens: {max_tokens}, Temperature: {temperature}")
-    
-    headers = {"Authorization": f"Bearer {GROK_API_KEY}", "Content-Type": "application/json"}
-    
+# Transient failures (connection errors, 429/5xx) are retried with exponential
+# backoff (0.5s, 1s, 2s), honouring Retry-After; a stream is only retried
+# before any of its output has been read
+_RETRIES = 3
+_RETRY_BACKOFF = 0.5
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+def _retry_delay(attempt: int, resp: Optional[httpx.Response] = None) -> float:
+    retry_after = resp.headers.get("Retry-After", "") if resp is not None else ""
+    if retry_after.isdigit():
+        return float(retry_after)
+    return _RETRY_BACKOFF * (2 ** attempt)
+
+def _build_payload(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
     # xAI API uses OpenAI-compatible chat completions format
-    payload = {
-        "model": "grok-3",
+    return {
+        "model": GROK_MODEL,
         "messages": [
             {"role": "user", "content": prompt}
         ],
         "max_tokens": max_tokens,
         "temperature": temperature
     }
-    
-    # Log the payload being sent (excluding sensitive API key)
-    logger.info(f"Grok API Call - Payload: {payload}")
-    
+
+def _cache_path(prompt: str, max_tokens: int, temperature: float) -> str:
+    key = hashlib.sha256(f"{GROK_MODEL}|{max_tokens}|{temperature}|{prompt}".encode()).hexdigest()
+    return os.path.join(_CACHE_DIR, key[:2], key + ".json")
+
+def _cache_get(path: str):
+    if not _CACHE_ENABLED:
+        return None
     try:
-        resp = requests.post(GROK_API_URL, json=payload, headers=headers, timeout=30)
-    except requests.RequestException as e:
-        logger.error(f"Grok API Network Error: {e}")
-        raise GrokError(f"Network error contacting Grok: {e}")
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return None
 
-    if resp.status_code != 200:
-        logger.error(f"Grok API Error - Status: {resp.status_code}, Response: {resp.text}")
-        raise GrokError(f"Grok API returned {resp.status_code}: {resp.text}")
+def _cache_put(path: str, result: Dict[str, Any]) -> None:
+    if not _CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(dumps(result))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write Grok cache entry: {e}")
 
-    data = resp.json()
-    
-    # Log the response for debugging
-    logger.info(f"Grok API Response - Status: {resp.status_code}")
-    logger.info(f"Grok API Response - Data Keys: {list(data.keys())}")
-    
-    # Extract text from OpenAI-compatible response format
+def _headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {GROK_API_KEY}", "Content-Type": "application/json"}
+
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract text from an OpenAI-compatible response body."""
     if "choices" in data and len(data["choices"]) > 0:
         text = data["choices"][0]["message"]["content"]
-        logger.info(f"Grok API Response - Text Length: {len(text)} characters")
-        logger.info(f"Grok API Response - Text Preview: {text[:200]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Grok API Response - Text Length: %d, Preview: %s...", len(text), text[:200])
     else:
         logger.error(f"Grok API Unexpected Response Format: {data}")
         raise GrokError(f"Unexpected Grok response format: {data}")
 
     return {"text": text, "raw": data}
+
+async def call_grok_async(
+    client: httpx.AsyncClient, prompt: str, max_tokens: int = 512, temperature: float = 0.2
+) -> Dict[str, Any]:
+    """
+    Call the xAI Grok chat completions endpoint over the caller's
+    httpx.AsyncClient, so many prompts can be in flight at once (e.g. under
+    asyncio.gather).
+    """
+    if not GROK_API_KEY:
+        raise GrokError("GROK_API_KEY environment variable is required")
+
+    cache_path = _cache_path(prompt, max_tokens, temperature)
+    cached = _cache_get(cache_path)
+    if cached is not None:
+        logger.debug("Grok API Async Call - cache hit")
+        return cached
+
+    logger.debug("Grok API Async Call - Prompt Length: %d", len(prompt))
+
+    payload = _build_payload(prompt, max_tokens, temperature)
+
+    for attempt in range(_RETRIES + 1):
+        try:
+            resp = await client.post(GROK_API_URL, json=payload, headers=_headers(), timeout=30)
+        except httpx.TransportError as e:
+            if attempt < _RETRIES:
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            logger.error(f"Grok API Network Error: {e}")
+            raise GrokError(f"Network error contacting Grok: {e}")
+        if resp.status_code in _RETRY_STATUSES and attempt < _RETRIES:
+            await asyncio.sleep(_retry_delay(attempt, resp))
+            continue
+        break
+
+    if resp.status_code != 200:
+        logger.error(f"Grok API Error - Status: {resp.status_code}, Response: {resp.text}")
+        raise GrokError(f"Grok API returned {resp.status_code}: {resp.text}")
+
+    logger.debug("Grok API Response - Status: %d", resp.status_code)
+    result = _parse_response(loads(resp.content))
+    _cache_put(cache_path, result)
+    return result
+
+async def call_grok_stream(
+    client: httpx.AsyncClient, prompt: str, max_tokens: int = 512, temperature: float = 0.2
+) -> AsyncIterator[str]:
+    """
+    Stream a completion, yielding text deltas as Grok produces them
+    (OpenAI-compatible server-sent events). Not cached itself; acall_grok_json
+    caches the decoded result.
+    """
+    if not GROK_API_KEY:
+        raise GrokError("GROK_API_KEY environment variable is required")
+
+    payload = _build_payload(prompt, max_tokens, temperature)
+    payload["stream"] = True
+
+    started = False
+    for attempt in range(_RETRIES + 1):
+        delay = None
+        try:
+            async with client.stream("POST", GROK_API_URL, json=payload, headers=_headers(), timeout=30) as resp:
+                if resp.status_code in _RETRY_STATUSES and attempt < _RETRIES:
+                    delay = _retry_delay(attempt, resp)
+                elif resp.status_code != 200:
+                    body = (await resp.aread()).decode(errors="replace")
+                    logger.error(f"Grok API Error - Status: {resp.status_code}, Response: {body}")
+                    raise GrokError(f"Grok API returned {resp.status_code}: {body}")
+                else:
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            event = loads(data)
+                            delta = event["choices"][0].get("delta", {}).get("content")
+                        except (ValueError, KeyError, IndexError) as e:
+                            raise GrokError(f"Unexpected Grok stream event: {data[:200]}") from e
+                        if delta:
+                            started = True
+                            yield delta
+                    return
+        except httpx.HTTPError as e:
+            if started or attempt >= _RETRIES or not isinstance(e, httpx.TransportError):
+                logger.error(f"Grok API Network Error: {e}")
+                raise GrokError(f"Network error contacting Grok: {e}")
+            delay = _retry_delay(attempt)
+        await asyncio.sleep(delay)
+
+# Shared async client for request handlers; created lazily on the running loop
+# and closed from the app's lifespan shutdown
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+        _ASYNC_CLIENT = httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=100))
+    return _ASYNC_CLIENT
+
+async def acall_grok_json(prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, Any]:
+    """
+    Stream a completion over the shared client and stop reading as soon as the
+    first complete JSON object has arrived. Returns {"text", "parsed"}, where
+    parsed is None if no object could be decoded from the whole response.
+    Shares the GROK_CACHE disk cache with call_grok_async; only responses
+    that decoded are written back.
+    """
+    cache_path = _cache_path(prompt, max_tokens, temperature)
+    cached = _cache_get(cache_path)
+    if cached is not None:
+        logger.debug("Grok API Stream Call - cache hit")
+        return {"text": cached["text"], "parsed": extract_json(cached["text"])}
+
+    result = None
+    scanner = _BraceScanner()
+    stream = call_grok_stream(_get_async_client(), prompt, max_tokens, temperature)
+    try:
+        async for delta in stream:
+            for block in scanner.feed(delta):
+                try:
+                    result = {"text": scanner.text, "parsed": loads(block)}
+                    break
+                except ValueError:
+                    continue
+            if result is not None:
+                break
+    finally:
+        await stream.aclose()
+    if result is None:
+        result = {"text": scanner.text, "parsed": extract_json(scanner.text)}
+    if result["parsed"] is not None:
+        _cache_put(cache_path, {"text": result["text"], "raw": {}})
+    return result
+
+async def aclose_grok_client() -> None:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+class _BraceScanner:
+    """
+    Finds top-level balanced {...} spans in text that may arrive in chunks,
+    using a single linear scan that tracks brace depth and skips braces
+    inside JSON strings. feed() returns the spans completed by each chunk.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._depth = 0
+        self._start = -1
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[str]:
+        blocks = []
+        offset = len(self.text)
+        self.text += chunk
+        for i, ch in enumerate(chunk, offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth:
+                    self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    blocks.append(self.text[self._start:i + 1])
+        return blocks
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    Parse the JSON object in a Grok completion, tolerating prose around it.
+    If the text starts with '{' (the usual case) it is parsed directly;
+    otherwise, or if that fails, the first balanced {...} block that parses
+    is returned. Returns None if no object can be parsed.
+    """
+    text = text.strip()
+    if text.startswith("{"):
+        try:
+            return loads(text)
+        except ValueError:
+            pass
+    for block in _BraceScanner().feed(text):
+        try:
+            return loads(block)
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,82 @@
+# backend/app/llm_cache.py
+"""
+In-process exact-match cache for parsed Grok results.
+Keyed on a hash of the full prompt, so any change to the lead data,
+scoring weights, tone or goal produces a new key. Entries expire after
+LLM_CACHE_TTL seconds and the oldest are evicted past LLM_CACHE_SIZE.
+coalesce() shares one in-flight call between concurrent identical requests.
+"""
+import os
+import asyncio
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+
+_entries: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+# Calls currently in progress, by key (only touched from the event loop)
+_inflight: Dict[str, asyncio.Future] = {}
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.blake2b(prompt.encode(), digest_size=20).hexdigest()
+
+def get(key: str) -> Optional[Any]:
+    if LLM_CACHE_TTL <= 0:
+        return None
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return value
+
+def put(key: str, value: Any) -> None:
+    if LLM_CACHE_TTL <= 0:
+        return
+    with _lock:
+        _entries[key] = (time.monotonic() + LLM_CACHE_TTL, value)
+        _entries.move_to_end(key)
+        while len(_entries) > LLM_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+async def coalesce(key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Await call(), unless a call for the same key is already in flight, in
+    which case wait for that one and share its result (or its exception).
+    """
+    pending = _inflight.get(key)
+    if pending is not None:
+        # shield so a disconnecting follower does not cancel the leader's call
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # mark retrieved so an exception with no followers is not reported as unhandled
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _inflight[key]
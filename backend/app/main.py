@@ -1,27 +1,35 @@
 # backend/app/main.py
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.database import init_db
+from app.grok_client import aclose_grok_client
 from app.routers import leads, evals_router
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
-app = FastAPI(title="SDR Grok Demo")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run the blocking schema setup in a worker thread rather than on the event loop
+    await asyncio.to_thread(init_db)
+    yield
+    await aclose_grok_client()
+
+app = FastAPI(title="SDR Grok Demo", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browsers read the listing's keyset pagination cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(leads.router)
 app.include_router(evals_router.router)
 
-@app.on_event("startup")
-def on_startup():
-    init_db()
-
 @app.get("/")
 def health():
     return {"status": "ok"}
@@ -1,6 +1,8 @@
 # backend/app/models.py
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import JSON, Column, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional, List
 import enum
 
@@ -20,17 +22,32 @@ class Lead(SQLModel, table=True):
     email: Optional[str] = None
     phone: Optional[str] = None
     website: Optional[str] = None
-    company_metadata: Optional[str] = None  # JSON string w/ company info
+    # Company info as a JSON object (JSONB on Postgres, JSON text elsewhere)
+    company_metadata: Optional[dict] = Field(
+        default=None,
+        sa_column=Column(JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")),
+    )
     score: Optional[float] = 0.0
-    stage: PipelineStage = PipelineStage.NEW
+    stage: PipelineStage = Field(default=PipelineStage.NEW, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     activities: List["ActivityLog"] = Relationship(back_populates="lead")
 
+    __table_args__ = (
+        # Serves the keyset-paginated listing "ORDER BY created_at DESC, id DESC"
+        Index("ix_lead_created_id", "created_at", "id"),
+        # One lead per company, case-insensitively; create_lead relies on it
+        # for INSERT ... ON CONFLICT DO NOTHING
+        Index("uq_lead_company_lower", text("lower(company)"), unique=True),
+    )
+
 class ActivityLog(SQLModel, table=True):
+    # Serves "WHERE lead_id = ? ORDER BY created_at DESC" as an index range scan
+    __table_args__ = (Index("ix_activity_lead_created", "lead_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     lead_id: int = Field(foreign_key="lead.id")
     actor: str  # e.g., "system" or user id
     action: str
     detail: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     lead: Optional[Lead] = Relationship(back_populates="activities")
@@ -1,9 +1,41 @@
 # backend/app/pipeline_service.py
+import os
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
-from sqlmodel import Session, select
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from sqlmodel import Session, select, insert
+from sqlalchemy import event, func
 from app.models import Lead, ActivityLog, PipelineStage
-import json
+from app._json import dumps
+
+# Score thresholds for auto-progression after qualification, highest first:
+# (minimum score, target stage, reason template). Scores below every
+# threshold fall through to _AUTO_DEFAULT.
+_AUTO_RULES = [
+    (80, PipelineStage.QUALIFIED, "High qualification score ({score}) - auto-progressed to Qualified"),
+    (60, PipelineStage.QUALIFIED, "Good qualification score ({score}) - auto-progressed to Qualified"),
+]
+_AUTO_DEFAULT = (PipelineStage.NEW, "Low qualification score ({score}) - kept at New stage")
+
+# Short-lived cache for the pipeline stats/analytics aggregates, keyed by name.
+# Cleared whenever any session commits, so within this process it only saves
+# queries between writes; other workers' writes show up within the TTL.
+PIPELINE_STATS_TTL = float(os.getenv("PIPELINE_STATS_TTL", "30"))
+_stats_cache: Dict[str, Tuple[float, Any]] = {}
+
+@event.listens_for(Session, "after_commit")
+def _clear_stats_cache(session) -> None:
+    _stats_cache.clear()
+
+def _cached_stats(key: str, compute: Callable[[], Any]) -> Any:
+    entry = _stats_cache.get(key)
+    now = time.monotonic()
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    value = compute()
+    if PIPELINE_STATS_TTL > 0:
+        _stats_cache[key] = (now + PIPELINE_STATS_TTL, value)
+    return value
 
 class PipelineService:
     """Service for managing lead pipeline progression and activity tracking"""
@@ -23,12 +55,19 @@ class PipelineService:
     @staticmethod
     def get_pipeline_stats(session: Session) -> Dict[str, int]:
         """Get pipeline statistics showing lead counts by stage"""
-        stats = {}
-        for stage in PipelineStage:
-            leads = session.exec(select(Lead).where(Lead.stage == stage)).all()
-            stats[stage.value] = len(leads)
+        stats = {stage.value: 0 for stage in PipelineStage}
+        rows = session.exec(
+            select(Lead.stage, func.count(Lead.id)).group_by(Lead.stage)
+        ).all()
+        for stage, count in rows:
+            stats[stage.value if hasattr(stage, "value") else stage] = count
         return stats
     
+    @staticmethod
+    def get_pipeline_stats_cached(session: Session) -> Dict[str, int]:
+        """get_pipeline_stats, reused for up to PIPELINE_STATS_TTL seconds"""
+        return _cached_stats("stats", lambda: PipelineService.get_pipeline_stats(session))
+    
     @staticmethod
     def log_activity(
         session: Session, 
@@ -36,46 +75,90 @@ class PipelineService:
         actor: str, 
         action: str, 
         detail: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        commit: bool = True
     ) -> ActivityLog:
-        """Log an activity for a lead"""
-        # For qualification and outreach activities, store clean detail text with metadata
-        if action in ['qualification_completed', 'outreach_generated']:
-            if metadata:
-                # Store clean text followed by JSON metadata for frontend parsing
-                detail_text = f"{detail} {json.dumps(metadata)}"
-            else:
-                detail_text = detail or "No details provided"
-        else:
-            # For other activities, append metadata to detail text if provided
-            if metadata:
-                detail_text = f"{detail} {json.dumps(metadata)}" if detail else json.dumps(metadata)
-            else:
-                detail_text = detail
-            
+        """Log an activity for a lead.
+
+        Pass commit=False to only add the row to the session, so the caller can
+        commit it together with its own changes in a single transaction.
+        """
         activity = ActivityLog(
             lead_id=lead_id,
             actor=actor,
             action=action,
-            detail=detail_text
+            detail=PipelineService._activity_detail(action, detail, metadata)
         )
         session.add(activity)
-        session.commit()
-        session.refresh(activity)
+        if commit:
+            session.commit()
+            session.refresh(activity)
         return activity
     
+    @staticmethod
+    def log_activities_bulk(session: Session, rows: List[Dict], commit: bool = True) -> int:
+        """Log many activities with a single multi-row INSERT.
+
+        Each row is a dict with lead_id, actor, action and optionally detail and
+        metadata (same meaning as the log_activity arguments). Returns the number
+        of rows inserted; commit=False leaves them in the caller's transaction.
+        """
+        if not rows:
+            return 0
+        now = datetime.utcnow()
+        values = [
+            {
+                "lead_id": row["lead_id"],
+                "actor": row["actor"],
+                "action": row["action"],
+                "detail": PipelineService._activity_detail(row["action"], row.get("detail"), row.get("metadata")),
+                "created_at": now,
+            }
+            for row in rows
+        ]
+        session.exec(insert(ActivityLog).values(values))
+        if commit:
+            session.commit()
+        return len(values)
+    
+    @staticmethod
+    def _activity_detail(action: str, detail: Optional[str], metadata: Optional[Dict]) -> Optional[str]:
+        # For qualification and outreach activities, store clean detail text with metadata
+        if action in ['qualification_completed', 'outreach_generated']:
+            if metadata:
+                # Store clean text followed by JSON metadata for frontend parsing
+                return f"{detail} {dumps(metadata)}"
+            return detail or "No details provided"
+        # For other activities, append metadata to detail text if provided
+        if metadata:
+            return f"{detail} {dumps(metadata)}" if detail else dumps(metadata)
+        return detail
+    
+    @staticmethod
+    def _resolve_lead(session: Session, lead_or_id: Union[int, Lead]) -> Lead:
+        """Return the Lead as-is if already loaded, otherwise look it up by id"""
+        if isinstance(lead_or_id, Lead):
+            return lead_or_id
+        lead = session.get(Lead, lead_or_id)
+        if not lead:
+            raise ValueError(f"Lead {lead_or_id} not found")
+        return lead
+    
     @staticmethod
     def progress_lead_stage(
         session: Session, 
-        lead_id: int, 
+        lead_or_id: Union[int, Lead], 
         new_stage: PipelineStage, 
         actor: str = "system",
-        reason: Optional[str] = None
+        reason: Optional[str] = None,
+        commit: bool = True
     ) -> Lead:
-        """Progress a lead to a new stage and log the activity only if stage actually changes"""
-        lead = session.get(Lead, lead_id)
-        if not lead:
-            raise ValueError(f"Lead {lead_id} not found")
+        """Progress a lead to a new stage and log the activity only if stage actually changes.
+
+        Accepts either a lead id or an already-loaded Lead (skips the lookup).
+        With commit=False the changes are left in the session for the caller to commit.
+        """
+        lead = PipelineService._resolve_lead(session, lead_or_id)
         
         old_stage = lead.stage
         
@@ -91,67 +174,64 @@ class PipelineService:
             detail += f" - {reason}"
         
         PipelineService.log_activity(
-            session, lead_id, actor, "stage_progression", detail
+            session, lead.id, actor, "stage_progression", detail, commit=False
         )
         
-        session.add(lead)
-        session.commit()
-        session.refresh(lead)
+        if commit:
+            session.commit()
+            session.refresh(lead)
         return lead
     
     @staticmethod
     def auto_progress_after_qualification(
         session: Session, 
-        lead_id: int, 
-        score: float
+        lead_or_id: Union[int, Lead], 
+        score: float,
+        commit: bool = True
     ) -> Lead:
         """Automatically progress lead based on qualification score"""
-        lead = session.get(Lead, lead_id)
-        if not lead:
-            raise ValueError(f"Lead {lead_id} not found")
-        
-        old_stage = lead.stage
+        lead = PipelineService._resolve_lead(session, lead_or_id)
         
         # Auto-progression rules based on score
-        if score >= 80:
-            new_stage = PipelineStage.QUALIFIED
-            reason = f"High qualification score ({score}) - auto-progressed to Qualified"
-        elif score >= 60:
-            new_stage = PipelineStage.QUALIFIED
-            reason = f"Good qualification score ({score}) - auto-progressed to Qualified"
-        else:
-            new_stage = PipelineStage.NEW
-            reason = f"Low qualification score ({score}) - kept at New stage"
+        new_stage, reason_template = next(
+            ((stage, template) for threshold, stage, template in _AUTO_RULES if score >= threshold),
+            _AUTO_DEFAULT
+        )
         
-        # Only log stage progression if the stage actually changes
-        if new_stage != old_stage:
-            return PipelineService.progress_lead_stage(
-                session, lead_id, new_stage, "system", reason
-            )
-        else:
-            # Stage didn't change, just update the lead without logging stage progression
-            lead.stage = new_stage
-            session.add(lead)
-            session.commit()
-            session.refresh(lead)
+        # Stage didn't change: nothing to write or log
+        if new_stage == lead.stage:
             return lead
+        
+        return PipelineService.progress_lead_stage(
+            session, lead, new_stage, "system", reason_template.format(score=score), commit=commit
+        )
     
     @staticmethod
-    def get_lead_activities(session: Session, lead_id: int) -> List[ActivityLog]:
-        """Get all activities for a lead, ordered by most recent first"""
-        activities = session.exec(
+    def get_lead_activities(
+        session: Session, lead_id: int, limit: Optional[int] = None, offset: int = 0
+    ) -> List[ActivityLog]:
+        """Get activities for a lead, ordered by most recent first (optionally one page)"""
+        query = (
             select(ActivityLog)
             .where(ActivityLog.lead_id == lead_id)
             .order_by(ActivityLog.created_at.desc())
-        ).all()
-        return activities
+            .offset(offset)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return session.exec(query).all()
+    
+    @staticmethod
+    def get_pipeline_analytics_cached(session: Session) -> Dict:
+        """get_pipeline_analytics, reused for up to PIPELINE_STATS_TTL seconds"""
+        return _cached_stats("analytics", lambda: PipelineService.get_pipeline_analytics(session))
     
     @staticmethod
     def get_pipeline_analytics(session: Session) -> Dict:
         """Get comprehensive pipeline analytics"""
-        all_leads = session.exec(select(Lead)).all()
-        total_leads = len(all_leads)
         stats = PipelineService.get_pipeline_stats(session)
+        # Every lead has exactly one stage, so the per-stage counts sum to the total
+        total_leads = sum(stats.values())
         
         # Calculate conversion rates
         won_count = stats.get("Won", 0)
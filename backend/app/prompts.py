@@ -1,44 +1,33 @@
 # backend/app/prompts.py
 from textwrap import dedent
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
-def qualification_prompt(lead: Dict, scoring_weights: Dict = None) -> str:
-    weights = scoring_weights or {
-        "company_size": 3,
-        "industry_fit": 5,
-        "funding": 2,
-        "decision_maker": 4,
-        "tech_stack": 2,
-        "revenue": 3
-    }
-    
-    # Create detailed scoring criteria based on weights
-    criteria_explanation = []
-    for criterion, weight in weights.items():
-        if criterion == "company_size":
-            criteria_explanation.append(f"- Company Size (weight: {weight}): Evaluate based on employee count - larger companies may have more budget and decision-making complexity")
-        elif criterion == "industry_fit":
-            criteria_explanation.append(f"- Industry Fit (weight: {weight}): Assess alignment with target industries - tech, SaaS, finance typically score higher")
-        elif criterion == "funding":
-            criteria_explanation.append(f"- Recent Funding (weight: {weight}): Consider recent funding rounds - well-funded companies have budget for new solutions")
-        elif criterion == "decision_maker":
-            criteria_explanation.append(f"- Decision Maker (weight: {weight}): Evaluate title/role - C-level, VP, Director roles indicate decision-making authority")
-        elif criterion == "tech_stack":
-            criteria_explanation.append(f"- Tech Stack (weight: {weight}): Assess technology alignment - modern tech stacks indicate innovation readiness")
-        elif criterion == "revenue":
-            criteria_explanation.append(f"- Revenue (weight: {weight}): Consider annual revenue - higher revenue suggests budget availability")
-    
-    criteria_text = "\n    ".join(criteria_explanation)
-    
-    return dedent(f"""
-    You are a sales qualification assistant. Evaluate this lead using the following weighted criteria:
+DEFAULT_SCORING_WEIGHTS = {
+    "company_size": 3,
+    "industry_fit": 5,
+    "funding": 2,
+    "decision_maker": 4,
+    "tech_stack": 2,
+    "revenue": 3
+}
 
-    {criteria_text}
+# Per-criterion explanation lines, filled in with the weight for each prompt
+_CRITERIA_TEMPLATES = {
+    "company_size": "- Company Size (weight: {w}): Evaluate based on employee count - larger companies may have more budget and decision-making complexity",
+    "industry_fit": "- Industry Fit (weight: {w}): Assess alignment with target industries - tech, SaaS, finance typically score higher",
+    "funding": "- Recent Funding (weight: {w}): Consider recent funding rounds - well-funded companies have budget for new solutions",
+    "decision_maker": "- Decision Maker (weight: {w}): Evaluate title/role - C-level, VP, Director roles indicate decision-making authority",
+    "tech_stack": "- Tech Stack (weight: {w}): Assess technology alignment - modern tech stacks indicate innovation readiness",
+    "revenue": "- Revenue (weight: {w}): Consider annual revenue - higher revenue suggests budget availability",
+}
 
-    Scoring Weights: {weights}
-
-    Lead Information:
-    {lead}
+# Each prompt is a static prefix (identical bytes on every call, so the
+# provider's automatic prefix cache can reuse it) followed by a short
+# per-call suffix carrying the weights and lead data. Both are dedented once
+# at import; only the suffix has placeholders to fill.
+_QUALIFICATION_PREFIX = dedent("""
+    You are a sales qualification assistant. Evaluate the lead given at the end of this message using the weighted criteria listed after these instructions.
 
     Instructions:
     1. Score each criterion from 0-10 based on the lead's information
@@ -47,37 +36,103 @@ def qualification_prompt(lead: Dict, scoring_weights: Dict = None) -> str:
     4. Provide a clear justification for the overall score
     5. Include detailed breakdown showing individual criterion scores
 
-    IMPORTANT: Return ONLY valid JSON. Do not include any explanatory text before or after the JSON. Start your response with {{ and end with }}.
+    IMPORTANT: Return ONLY valid JSON. Do not include any explanatory text before or after the JSON. Start your response with { and end with }.
 
     Return strictly valid JSON:
-    {{
+    {
       "score": <int 0-100>,
       "justification": "<string explaining the overall score>",
-      "breakdown": {{
-        "company_size": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}},
-        "industry_fit": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}},
-        "funding": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}},
-        "decision_maker": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}},
-        "tech_stack": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}},
-        "revenue": {{"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}}
-      }}
-    }}
+      "breakdown": {
+        "company_size": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"},
+        "industry_fit": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"},
+        "funding": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"},
+        "decision_maker": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"},
+        "tech_stack": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"},
+        "revenue": {"score": <0-10>, "weighted_score": <float>, "reason": "<string>"}
+      }
+    }
     """).strip()
 
-def outreach_prompt(lead: Dict, tone: str="professional", goal: str="book a 30-min discovery call") -> str:
-    return dedent(f"""
-    You are an SDR writing a cold outreach email tailored to the lead below.
+_QUALIFICATION_SUFFIX = dedent("""
+
+    Weighted criteria:
+    {criteria_text}
+
+    Scoring Weights: {weights}
+
+    Lead Information:
+    {lead}
+    """).rstrip()
+
+_OUTREACH_PREFIX = dedent("""
+    You are an SDR writing a cold outreach email tailored to the lead given at the end of this message.
     Use the lead/company metadata to personalize subject and first paragraph.
-    Keep it short (subject + 3 short paragraphs), end with a clear CTA to {goal}.
+    Keep it short (subject + 3 short paragraphs), in the requested tone, and end with a clear CTA for the requested goal.
     Output JSON:
-    {{
+    {
       "subject": "<subject line>",
       "body": "<email body in plain text>",
       "tags": ["<tag1>", "<tag2>"]
-    }}
+    }
+    """).strip()
+
+_OUTREACH_SUFFIX = dedent("""
+
+    Tone: {tone}
+    Goal: {goal}
 
     Lead:
     {lead}
+    """).rstrip()
 
-    Tone: {tone}
-    """).strip()
+def _freeze(d: Dict) -> Optional[Tuple]:
+    """Hashable, order-preserving key for a flat dict, or None if a value is unhashable.
+
+    Each value carries its type: 2, 2.0 and True compare (and hash) equal but
+    render differently in the prompt, so they must not share a cache entry.
+    """
+    key = tuple((k, type(v), v) for k, v in d.items())
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _thaw(key: Tuple) -> Dict:
+    return {k: v for k, _, v in key}
+
+def qualification_prompt(lead: Dict, scoring_weights: Dict = None) -> str:
+    weights = scoring_weights or DEFAULT_SCORING_WEIGHTS
+    lead_key, weights_key = _freeze(lead), _freeze(weights)
+    if lead_key is None or weights_key is None:
+        return _build_qualification_prompt(lead, weights)
+    return _qualification_prompt_cached(lead_key, weights_key)
+
+@lru_cache(maxsize=1024)
+def _qualification_prompt_cached(lead_key: Tuple, weights_key: Tuple) -> str:
+    return _build_qualification_prompt(_thaw(lead_key), _thaw(weights_key))
+
+def _build_qualification_prompt(lead: Dict, weights: Dict) -> str:
+    # Create detailed scoring criteria based on weights (unknown criteria are skipped)
+    criteria_text = "\n".join([
+        _CRITERIA_TEMPLATES[criterion].format(w=weight)
+        for criterion, weight in weights.items()
+        if criterion in _CRITERIA_TEMPLATES
+    ])
+
+    return _QUALIFICATION_PREFIX + _QUALIFICATION_SUFFIX.format_map(
+        {"criteria_text": criteria_text, "weights": weights, "lead": lead}
+    )
+
+def outreach_prompt(lead: Dict, tone: str="professional", goal: str="book a 30-min discovery call") -> str:
+    lead_key = _freeze(lead)
+    if lead_key is None:
+        return _build_outreach_prompt(lead, tone, goal)
+    return _outreach_prompt_cached(lead_key, tone, goal)
+
+@lru_cache(maxsize=1024)
+def _outreach_prompt_cached(lead_key: Tuple, tone: str, goal: str) -> str:
+    return _build_outreach_prompt(_thaw(lead_key), tone, goal)
+
+def _build_outreach_prompt(lead: Dict, tone: str, goal: str) -> str:
+    return _OUTREACH_PREFIX + _OUTREACH_SUFFIX.format_map({"lead": lead, "tone": tone, "goal": goal})
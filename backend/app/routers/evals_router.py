@@ -1,9 +1,9 @@
 # backend/app/routers/evals_router.py
 from fastapi import APIRouter
-from app.evals import run_evals
+from app.evals import run_evals_async
 router = APIRouter(prefix="/evals", tags=["evals"])
 
 @router.get("/run")
-def run():
-    results = run_evals()
+async def run():
+    results = await run_evals_async()
     return {"results_summary": results}
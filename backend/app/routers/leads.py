@@ -1,15 +1,23 @@
 # backend/app/routers/leads.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select, Session
-from app.database import get_session
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select, delete, update, or_, and_, Session
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import engine, get_session, index_missing
 from app.models import Lead, ActivityLog, PipelineStage
-from app.schemas import LeadCreate, LeadRead, LeadUpdate, QualificationRequest, StageProgressionRequest
-from app.grok_client import call_grok, GrokError
+from app.schemas import LeadCreate, LeadRead, LeadUpdate, QualificationRequest, BulkQualificationRequest, StageProgressionRequest
+from app.grok_client import acall_grok_json, GrokError, GROK_CONCURRENCY
 from app.prompts import qualification_prompt, outreach_prompt
 from app.pipeline_service import PipelineService
 from app.search_service import SearchService
-import json
+from app._json import dumps
+from app import llm_cache
+import asyncio
+import hashlib
 import logging
+from datetime import datetime, timedelta
 from typing import Optional
 
 # Set up logging
@@ -17,58 +25,117 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/leads", tags=["leads"])
 
+# Write handlers that create/update a lead together with its activity log add
+# both rows to the session and commit once, so each request is one transaction.
+
+def _in_own_session(fn, *args):
+    """Call fn(session, *args) with a fresh Session, for work that runs outside
+    the request's session (worker threads, background tasks); a Session is not
+    thread-safe and the request's one is closed once the response is sent."""
+    with Session(engine) as session:
+        return fn(session, *args)
+
+def _insert_for(session: Session):
+    """The dialect's insert() construct, which supports ON CONFLICT"""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+def _lead_prompt_data(lead: Lead) -> dict:
+    """Lead fields sent to Grok for qualification/outreach"""
+    return {
+        "company": lead.company,
+        "name": lead.name,
+        "title": lead.title,
+        "email": lead.email,
+        "website": lead.website,
+        # serialised (sorted keys) so the prompt text stays stable and cacheable
+        "company_metadata": dumps(lead.company_metadata) if lead.company_metadata is not None else None
+    }
+
+def _qualification_detail(score: float, justification: str) -> str:
+    trailing = "..." if len(justification) > 100 else ""
+    return "AI qualification completed with score %s/100. Analysis: %s%s" % (score, justification[:100], trailing)
+
+def _new_lead(payload: LeadCreate) -> Lead:
+    """Validate a create payload and build the (unsaved) Lead with trimmed fields"""
+    if not payload.company or not payload.company.strip():
+        raise HTTPException(status_code=400, detail="Company name is required")
+    return Lead(
+        company=payload.company.strip(),
+        name=payload.name.strip() if payload.name else None,
+        title=payload.title.strip() if payload.title else None,
+        email=payload.email.strip() if payload.email else None,
+        phone=payload.phone.strip() if payload.phone else None,
+        website=payload.website.strip() if payload.website else None,
+        company_metadata=payload.company_metadata or {},
+    )
+
+def _existing_companies(session: Session, companies: list[str], exclude_id: Optional[int] = None) -> Optional[set[str]]:
+    """Lower-cased companies among `companies` that already have a lead
+    (other than exclude_id), or None when uq_lead_company_lower enforces that.
+
+    The check is only needed while the index is missing: init_db could not
+    build it over companies that differ only in case, so ON CONFLICT DO NOTHING
+    has no unique index to conflict on. scripts/cleanup_duplicates.py removes
+    those rows (GET /leads/duplicates uses the same lower(company) key); the
+    index is built, and this check switched off, on the next start.
+    """
+    if not index_missing("uq_lead_company_lower"):
+        return None
+    query = select(func.lower(Lead.company)).where(
+        func.lower(Lead.company).in_({company.lower() for company in companies})
+    )
+    if exclude_id is not None:
+        query = query.where(Lead.id != exclude_id)
+    return set(session.exec(query).all())
+
+def _lead_created_detail(lead: Lead) -> str:
+    return f"Lead created for {lead.company} - {lead.name or 'No contact name'}"
+
 @router.post("/", response_model=LeadRead)
 def create_lead(payload: LeadCreate, session: Session = Depends(get_session)):
     """Create a new lead with proper error handling"""
     try:
-        # Validate required fields
-        if not payload.company or not payload.company.strip():
-            raise HTTPException(status_code=400, detail="Company name is required")
+        new_lead = _new_lead(payload)
         
-        # Check for duplicate company names
-        existing_lead = session.exec(
-            select(Lead).where(Lead.company.ilike(payload.company.strip()))
-        ).first()
+        # Insert unless a lead with the same company (case-insensitive, enforced
+        # by uq_lead_company_lower) exists: one statement, and no window between
+        # a duplicate check and the insert
+        if _existing_companies(session, [new_lead.company]):
+            lead = None
+        else:
+            lead = session.exec(
+                _insert_for(session)(Lead)
+                .values(**new_lead.model_dump(exclude={"id"}))
+                .on_conflict_do_nothing()
+                .returning(Lead)
+            ).scalars().one_or_none()
         
-        if existing_lead:
+        if lead is None:
+            session.rollback()
             raise HTTPException(
                 status_code=409, 
                 detail=f"Lead with company '{payload.company}' already exists"
             )
         
-        # Create lead with proper metadata handling
-        try:
-            metadata_json = json.dumps(payload.company_metadata or {})
-        except (TypeError, ValueError) as e:
-            logger.error(f"Invalid company metadata: {e}")
-            raise HTTPException(status_code=400, detail="Invalid company metadata format")
-        
-        lead = Lead(
-            company=payload.company.strip(),
-            name=payload.name.strip() if payload.name else None,
-            title=payload.title.strip() if payload.title else None,
-            email=payload.email.strip() if payload.email else None,
-            phone=payload.phone.strip() if payload.phone else None,
-            website=payload.website.strip() if payload.website else None,
-            company_metadata=metadata_json,
-        )
-        
-        session.add(lead)
-        session.commit()
-        session.refresh(lead)
-        
-        # Log the lead creation activity
+        # Log the lead creation activity in the same transaction
         try:
             PipelineService.log_activity(
                 session, lead.id, "system", "lead_created", 
-                f"Lead created for {lead.company} - {lead.name or 'No contact name'}"
+                _lead_created_detail(lead),
+                commit=False
             )
         except Exception as e:
             logger.error(f"Failed to log lead creation activity: {e}")
             # Don't fail the request if logging fails
         
-        logger.info(f"Successfully created lead {lead.id} for company {lead.company}")
-        return lead
+        # Snapshot the RETURNING row before commit expires it
+        created = LeadRead.model_validate(lead)
+        session.commit()
+        
+        logger.info(f"Successfully created lead {created.id} for company {created.company}")
+        return created
         
     except HTTPException:
         raise
@@ -77,10 +144,149 @@ def create_lead(payload: LeadCreate, session: Session = Depends(get_session)):
         session.rollback()
         raise HTTPException(status_code=500, detail="Internal server error creating lead")
 
-@router.get("/", response_model=list[LeadRead])
-def list_leads(session=Depends(get_session)):
-    leads = session.exec(select(Lead).order_by(Lead.created_at.desc())).all()
-    return leads
+@router.post("/bulk", summary="Create many leads at once")
+def create_leads_bulk(payloads: list[LeadCreate], session: Session = Depends(get_session)):
+    """Create several leads with one INSERT and one commit.
+
+    Companies that already exist (or repeat within the request) are skipped
+    rather than failing the whole batch; they are listed under "skipped".
+    """
+    new_leads = [_new_lead(payload) for payload in payloads]
+    if not new_leads:
+        return {"created": [], "skipped": []}
+    
+    try:
+        # Without the unique index, drop existing and repeated companies here
+        existing = _existing_companies(session, [lead.company for lead in new_leads])
+        if existing is not None:
+            to_insert = []
+            for lead in new_leads:
+                if lead.company.lower() not in existing:
+                    existing.add(lead.company.lower())
+                    to_insert.append(lead)
+        else:
+            to_insert = new_leads
+        leads = session.exec(
+            _insert_for(session)(Lead)
+            .values([lead.model_dump(exclude={"id"}) for lead in to_insert])
+            .on_conflict_do_nothing()
+            .returning(Lead)
+        ).scalars().all() if to_insert else []
+        
+        try:
+            PipelineService.log_activities_bulk(
+                session,
+                [
+                    {"lead_id": lead.id, "actor": "system", "action": "lead_created", "detail": _lead_created_detail(lead)}
+                    for lead in leads
+                ],
+                commit=False
+            )
+        except Exception as e:
+            logger.error(f"Failed to log lead creation activities: {e}")
+        
+        # Snapshot the RETURNING rows before commit expires them
+        created = [_lead_to_dict(lead) for lead in leads]
+        session.commit()
+    except Exception as e:
+        logger.error(f"Unexpected error creating leads in bulk: {e}")
+        session.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error creating leads")
+    
+    created_companies = {lead["company"].lower() for lead in created}
+    skipped = []
+    for lead in new_leads:
+        if lead.company.lower() in created_companies:
+            created_companies.discard(lead.company.lower())
+        else:
+            skipped.append(lead.company)
+    
+    logger.info(f"Created {len(created)} leads in bulk, skipped {len(skipped)}")
+    return {"created": created, "skipped": skipped}
+
+def _lead_to_dict(lead: Lead) -> dict:
+    """Plain-JSON projection of a lead with the same fields as LeadRead"""
+    return {
+        "id": lead.id,
+        "company": lead.company,
+        "name": lead.name,
+        "title": lead.title,
+        "email": lead.email,
+        "phone": lead.phone,
+        "website": lead.website,
+        "company_metadata": lead.company_metadata,
+        "score": lead.score,
+        "stage": lead.stage.value,
+        "created_at": lead.created_at.isoformat(),
+    }
+
+# The listing skips per-row LeadRead validation on the way out; LeadRead still
+# documents the response shape in the OpenAPI schema
+@router.get("/", responses={200: {"model": list[LeadRead]}})
+def list_leads(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    session=Depends(get_session),
+):
+    """List leads, newest first, one page at a time.
+
+    Pass the previous page's X-Next-Cursor values as before/before_id for
+    keyset pagination (no OFFSET scan); limit/offset still work on their own.
+    """
+    query = select(Lead).order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit)
+    if before is not None:
+        if before_id is not None:
+            query = query.where(or_(
+                Lead.created_at < before,
+                and_(Lead.created_at == before, Lead.id < before_id),
+            ))
+        else:
+            query = query.where(Lead.created_at < before)
+    elif offset:
+        query = query.offset(offset)
+    leads = session.exec(query).all()
+    response = Response(content=dumps([_lead_to_dict(lead) for lead in leads]), media_type="application/json")
+    if len(leads) == limit:
+        last = leads[-1]
+        response.headers["X-Next-Cursor"] = f"before={last.created_at.isoformat()}&before_id={last.id}"
+    return response
+
+@router.get("/duplicates", summary="List leads sharing a company name")
+def list_duplicate_leads(session=Depends(get_session)):
+    """Groups of leads whose company names match case-insensitively, most
+    recent lead first.
+
+    This is the lower(company) key of the uq_lead_company_lower index, so these
+    are exactly the rows that keep init_db from building it. The grouping runs
+    in SQL (GROUP BY ... HAVING COUNT(*) > 1), so only the duplicated leads are
+    fetched.
+    """
+    company_key = func.lower(Lead.company)
+    groups = (
+        select(company_key.label("company_key"))
+        .group_by(company_key)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    rows = session.exec(
+        select(company_key, Lead.id, Lead.company, Lead.email, Lead.created_at)
+        .join(groups, company_key == groups.c.company_key)
+        .order_by(company_key, Lead.created_at.desc(), Lead.id.desc())
+    ).all()
+    
+    duplicates = []
+    previous_key = None
+    for key, lead_id, company, email, created_at in rows:
+        if key != previous_key:
+            # Named after the most recent lead of the group
+            duplicates.append({"company": company, "leads": []})
+            previous_key = key
+        duplicates[-1]["leads"].append({
+            "id": lead_id, "company": company, "email": email, "created_at": created_at.isoformat()
+        })
+    return duplicates
 
 @router.get("/{lead_id}", response_model=LeadRead)
 def get_lead(lead_id: int, session=Depends(get_session)):
@@ -91,231 +297,343 @@ def get_lead(lead_id: int, session=Depends(get_session)):
 
 @router.put("/{lead_id}", response_model=LeadRead)
 def update_lead(lead_id: int, payload: LeadUpdate, session=Depends(get_session)):
-    lead = session.get(Lead, lead_id)
-    if not lead:
-        raise HTTPException(status_code=404, detail="lead not found")
-    
-    # Update only provided fields
-    update_data = payload.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        if field == "company_metadata" and value is not None:
-            setattr(lead, field, json.dumps(value))
+    # Update only provided fields, in one UPDATE ... RETURNING (no SELECT first)
+    update_data = payload.model_dump(exclude_unset=True)
+    if update_data.get("company") and _existing_companies(session, [update_data["company"]], exclude_id=lead_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Lead with company '{update_data['company']}' already exists"
+        )
+    try:
+        if update_data:
+            lead = session.exec(
+                update(Lead).where(Lead.id == lead_id).values(**update_data).returning(Lead)
+            ).scalars().one_or_none()
         else:
-            setattr(lead, field, value)
-    
-    session.add(lead)
-    session.add(ActivityLog(lead_id=lead.id, actor="system", action="updated lead", detail=f"Updated fields: {list(update_data.keys())}"))
-    session.commit()
-    session.refresh(lead)
-    return lead
+            lead = session.get(Lead, lead_id)
+        if not lead:
+            session.rollback()
+            raise HTTPException(status_code=404, detail="lead not found")
+        
+        # Snapshot the RETURNING row before commit expires it, so no reload SELECT is needed
+        updated = LeadRead.model_validate(lead)
+        session.add(ActivityLog(lead_id=lead_id, actor="system", action="updated lead", detail=f"Updated fields: {list(update_data.keys())}"))
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        # Only a rename onto a company another lead already has is a conflict;
+        # the driver's message names the violated index on SQLite and Postgres
+        if "uq_lead_company_lower" not in str(e.orig):
+            raise
+        raise HTTPException(
+            status_code=409,
+            detail=f"Lead with company '{update_data.get('company')}' already exists"
+        )
+    return updated
 
 @router.delete("/{lead_id}")
 def delete_lead(lead_id: int, session=Depends(get_session)):
-    lead = session.get(Lead, lead_id)
-    if not lead:
+    # Delete associated activity logs first, then the lead; both are single
+    # statements and the lead's rowcount doubles as the existence check
+    session.exec(delete(ActivityLog).where(ActivityLog.lead_id == lead_id))
+    deleted = session.exec(delete(Lead).where(Lead.id == lead_id)).rowcount
+    if not deleted:
+        session.rollback()
         raise HTTPException(status_code=404, detail="lead not found")
     
-    # Delete associated activity logs first
-    activity_logs = session.exec(select(ActivityLog).where(ActivityLog.lead_id == lead_id)).all()
-    for log in activity_logs:
-        session.delete(log)
-    
-    session.delete(lead)
     session.commit()
     return {"message": f"Lead {lead_id} deleted successfully"}
 
+def _save_qualification(session: Session, lead: Lead, score: float, parsed: dict) -> dict:
+    """Persist a qualification result (score, activity log, auto-progression).
+
+    All three writes are staged in the session and committed together, so the
+    whole save is one transaction and one round of flushes. Blocking DB work,
+    run from the async qualify handler via run_in_threadpool.
+    """
+    lead_id = lead.id
+    lead.score = score
+    
+    # Log the qualification activity
+    try:
+        justification = parsed.get("justification", "No justification provided")
+        clean_detail = _qualification_detail(score, justification)
+        PipelineService.log_activity(
+            session, lead_id, "system", "qualification_completed",
+            clean_detail,
+            {"score": score, "justification": justification, "breakdown": parsed.get("breakdown", {})},
+            commit=False
+        )
+    except Exception as e:
+        logger.error(f"Failed to log qualification activity for lead {lead_id}: {e}")
+        # Don't fail the request if logging fails
+    
+    # Auto-progress based on score
+    try:
+        PipelineService.auto_progress_after_qualification(session, lead, score, commit=False)
+    except Exception as e:
+        logger.error(f"Error auto-progressing lead {lead_id}: {e}")
+        # Save the score even if auto-progression fails
+    
+    # Read the response fields before commit expires the instance
+    result = {
+        "lead_id": lead_id, 
+        "score": lead.score, 
+        "stage": lead.stage, 
+        "grok_output": parsed
+    }
+    
+    try:
+        session.commit()
+    except Exception as e:
+        logger.error(f"Error updating lead score for lead {lead_id}: {e}")
+        session.rollback()
+        raise HTTPException(status_code=500, detail="Error updating lead score")
+    
+    return result
+
+async def _grok_qualification(prompt: str, lead_id: int) -> dict:
+    """Call Grok with a qualification prompt and return the validated JSON result."""
+    try:
+        logger.info(f"Calling Grok for lead {lead_id} qualification")
+        # Streamed: reading stops as soon as the JSON object is complete
+        resp = await acall_grok_json(prompt)
+    except GrokError as e:
+        logger.error(f"Grok API error for lead {lead_id}: {e}")
+        raise HTTPException(status_code=502, detail=f"AI qualification service error: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error calling Grok for lead {lead_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal error calling AI service")
+
+    text = resp["text"].strip()
+    parsed = resp["parsed"]
+    
+    if parsed is None:
+        logger.error(f"Could not parse Grok response for lead {lead_id}: {text[:200]}")
+        raise HTTPException(
+            status_code=502, 
+            detail=f"AI returned invalid response format. Response preview: {text[:200]}"
+        )
+
+    # Validate parsed response
+    if "score" not in parsed:
+        logger.error(f"Grok response missing score for lead {lead_id}: {parsed}")
+        raise HTTPException(status_code=502, detail="AI response missing required score field")
+    
+    try:
+        score = float(parsed.get("score", 0))
+        if not (0 <= score <= 100):
+            logger.warning(f"Grok returned unusual score {score} for lead {lead_id}")
+    except (ValueError, TypeError) as e:
+        logger.error(f"Invalid score format for lead {lead_id}: {parsed.get('score')}")
+        raise HTTPException(status_code=502, detail="AI returned invalid score format")
+
+    return parsed
+
+async def _cached_qualification(prompt: str, lead_id: int) -> dict:
+    """_grok_qualification behind the in-process result cache"""
+    # Identical prompts (same lead data and weights) reuse the last validated result
+    cache_key = llm_cache.prompt_key(prompt)
+    parsed = llm_cache.get(cache_key)
+    if parsed is None:
+        # Concurrent identical requests (e.g. a double-clicked Qualify) share one Grok call
+        parsed = await llm_cache.coalesce(cache_key, lambda: _grok_qualification(prompt, lead_id))
+        llm_cache.put(cache_key, parsed)
+    else:
+        logger.info(f"Using cached qualification for lead {lead_id}")
+    return parsed
+
 @router.post("/qualify", summary="Run Grok qualification")
-def qualify(req: QualificationRequest, session: Session = Depends(get_session)):
-    """Run AI qualification on a lead with comprehensive error handling"""
+async def qualify(req: QualificationRequest, session: Session = Depends(get_session)):
+    """Run AI qualification on a lead with comprehensive error handling.
+
+    Async so the Grok round trip does not hold a threadpool worker; the
+    blocking DB steps are dispatched with run_in_threadpool.
+    """
     try:
         # Validate request
         if not req.lead_id or req.lead_id <= 0:
             raise HTTPException(status_code=400, detail="Valid lead_id is required")
         
         # Get lead with error handling
-        lead = session.get(Lead, req.lead_id)
+        lead = await run_in_threadpool(session.get, Lead, req.lead_id)
         if not lead:
             raise HTTPException(status_code=404, detail=f"Lead with ID {req.lead_id} not found")
 
-        # Validate scoring weights if provided
-        if req.scoring_weights:
-            for key, value in req.scoring_weights.items():
-                if not isinstance(value, (int, float)) or value < 1 or value > 10:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Scoring weight for '{key}' must be a number between 1 and 10"
-                    )
-
         # Prepare lead data
         try:
-            lead_data = {
-                "company": lead.company,
-                "name": lead.name,
-                "title": lead.title,
-                "email": lead.email,
-                "website": lead.website,
-                "company_metadata": lead.company_metadata
-            }
+            lead_data = _lead_prompt_data(lead)
         except Exception as e:
             logger.error(f"Error preparing lead data: {e}")
             raise HTTPException(status_code=500, detail="Error preparing lead data")
 
-        # Generate prompt and call Grok
         try:
             prompt = qualification_prompt(lead_data, req.scoring_weights)
-            logger.info(f"Calling Grok for lead {lead.id} qualification")
-            resp = call_grok(prompt)
-        except GrokError as e:
-            logger.error(f"Grok API error for lead {lead.id}: {e}")
-            raise HTTPException(status_code=502, detail=f"AI qualification service error: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error calling Grok for lead {lead.id}: {e}")
+            logger.error(f"Unexpected error building prompt for lead {req.lead_id}: {e}")
             raise HTTPException(status_code=500, detail="Internal error calling AI service")
 
-        # Parse Grok response with robust error handling
-        text = resp["text"].strip()
-        parsed = None
-        
-        # Try direct JSON parsing first
-        try:
-            parsed = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from text
-            import re
-            json_match = re.search(r"(\{.*\})", text, re.S)
-            if json_match:
-                try:
-                    parsed = json.loads(json_match.group(1))
-                except json.JSONDecodeError:
-                    pass
-        
-        if parsed is None:
-            logger.error(f"Could not parse Grok response for lead {lead.id}: {text[:200]}")
-            raise HTTPException(
-                status_code=502, 
-                detail=f"AI returned invalid response format. Response preview: {text[:200]}"
-            )
+        parsed = await _cached_qualification(prompt, req.lead_id)
+        score = float(parsed["score"])
 
-        # Validate parsed response
-        if "score" not in parsed:
-            logger.error(f"Grok response missing score for lead {lead.id}: {parsed}")
-            raise HTTPException(status_code=502, detail="AI response missing required score field")
+        result = await run_in_threadpool(_save_qualification, session, lead, score, parsed)
         
-        try:
-            score = float(parsed.get("score", 0))
-            if not (0 <= score <= 100):
-                logger.warning(f"Grok returned unusual score {score} for lead {lead.id}")
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid score format for lead {lead.id}: {parsed.get('score')}")
-            raise HTTPException(status_code=502, detail="AI returned invalid score format")
-
-        # Update lead score
-        try:
-            lead.score = score
-            session.add(lead)
-            session.commit()
-        except Exception as e:
-            logger.error(f"Error updating lead score for lead {lead.id}: {e}")
-            session.rollback()
-            raise HTTPException(status_code=500, detail="Error updating lead score")
-        
-        # Log the qualification activity
-        try:
-            justification = parsed.get("justification", "No justification provided")
-            clean_detail = f"AI qualification completed with score {score}/100. Analysis: {justification[:100]}{'...' if len(justification) > 100 else ''}"
-            PipelineService.log_activity(
-                session, lead.id, "system", "qualification_completed",
-                clean_detail,
-                {"score": score, "justification": justification, "breakdown": parsed.get("breakdown", {})}
-            )
-        except Exception as e:
-            logger.error(f"Failed to log qualification activity for lead {lead.id}: {e}")
-            # Don't fail the request if logging fails
-        
-        # Auto-progress based on score
-        try:
-            updated_lead = PipelineService.auto_progress_after_qualification(session, lead.id, score)
-        except Exception as e:
-            logger.error(f"Error auto-progressing lead {lead.id}: {e}")
-            # Return the lead even if auto-progression fails
-            updated_lead = lead
-        
-        logger.info(f"Successfully qualified lead {lead.id} with score {score}")
-        return {
-            "lead_id": updated_lead.id, 
-            "score": updated_lead.score, 
-            "stage": updated_lead.stage, 
-            "grok_output": parsed
-        }
+        logger.info(f"Successfully qualified lead {req.lead_id} with score {score}")
+        return result
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Unexpected error in qualification for lead {req.lead_id}: {e}")
-        session.rollback()
+        await run_in_threadpool(session.rollback)
         raise HTTPException(status_code=500, detail="Internal server error during qualification")
 
-@router.post("/outreach/{lead_id}", summary="Generate outreach message")
-def generate_outreach(lead_id: int, tone: str = "friendly", goal: str = "book a meeting", session=Depends(get_session)):
-    lead = session.get(Lead, lead_id)
-    if not lead:
-        raise HTTPException(status_code=404, detail="lead not found")
-    lead_data = {
-        "company": lead.company, "name": lead.name, "title": lead.title, "email": lead.email, "website": lead.website, "company_metadata": lead.company_metadata
+def _save_bulk_qualifications(session: Session, qualified: list) -> None:
+    """Persist (lead, score, parsed, result) qualifications in one transaction:
+    one multi-row activity INSERT, then each lead's auto-progression. Blocking
+    DB work, run from qualify_bulk via run_in_threadpool."""
+    activity_rows = []
+    for lead, score, parsed, result in qualified:
+        lead.score = score
+        justification = parsed.get("justification", "No justification provided")
+        activity_rows.append({
+            "lead_id": lead.id,
+            "actor": "system",
+            "action": "qualification_completed",
+            "detail": _qualification_detail(score, justification),
+            "metadata": {"score": score, "justification": justification, "breakdown": parsed.get("breakdown", {})},
+        })
+    try:
+        # All qualification activities go in as one multi-row INSERT, ahead of
+        # any stage progression they trigger
+        PipelineService.log_activities_bulk(session, activity_rows, commit=False)
+        for lead, score, parsed, result in qualified:
+            PipelineService.auto_progress_after_qualification(session, lead, score, commit=False)
+            result["stage"] = lead.stage
+        session.commit()
+    except Exception as e:
+        logger.error(f"Error saving bulk qualification results: {e}")
+        session.rollback()
+        raise HTTPException(status_code=500, detail="Error saving qualification results")
+
+@router.post("/qualify_bulk", summary="Run Grok qualification on many leads")
+async def qualify_bulk(req: BulkQualificationRequest, session: Session = Depends(get_session)):
+    """Qualify several leads at once, calling Grok for all of them concurrently.
+
+    Each lead goes through the same cached, coalesced Grok path as /qualify;
+    the DB reads and the single commit run in the threadpool.
+    """
+    leads = await run_in_threadpool(lambda: session.exec(select(Lead).where(Lead.id.in_(req.lead_ids))).all())
+    found_ids = {lead.id for lead in leads}
+    prompts = [qualification_prompt(_lead_prompt_data(lead), req.scoring_weights) for lead in leads]
+    
+    sem = asyncio.Semaphore(GROK_CONCURRENCY)
+    
+    async def _qualify_one(lead: Lead, prompt: str):
+        async with sem:
+            return await _cached_qualification(prompt, lead.id)
+    
+    outcomes = await asyncio.gather(
+        *[_qualify_one(lead, prompt) for lead, prompt in zip(leads, prompts)], return_exceptions=True
+    )
+    
+    results = []
+    qualified = []
+    for lead, outcome in zip(leads, outcomes):
+        if isinstance(outcome, HTTPException):
+            results.append({"lead_id": lead.id, "error": outcome.detail})
+            continue
+        if isinstance(outcome, BaseException):
+            logger.error(f"Unexpected error qualifying lead {lead.id}: {outcome}")
+            results.append({"lead_id": lead.id, "error": "Internal error calling AI service"})
+            continue
+        
+        score = float(outcome["score"])
+        result = {"lead_id": lead.id, "score": score, "stage": lead.stage, "grok_output": outcome}
+        results.append(result)
+        qualified.append((lead, score, outcome, result))
+    
+    await run_in_threadpool(_save_bulk_qualifications, session, qualified)
+    
+    return {
+        "results": results,
+        "not_found": [lead_id for lead_id in req.lead_ids if lead_id not in found_ids]
     }
-    prompt = outreach_prompt(lead_data, tone=tone, goal=goal)
+
+async def _grok_outreach(prompt: str) -> dict:
+    """Call Grok with an outreach prompt and return the parsed message."""
     try:
-        resp = call_grok(prompt)
+        resp = await acall_grok_json(prompt)
     except GrokError as e:
         raise HTTPException(status_code=502, detail=str(e))
 
-    text = resp["text"]
-    # parse JSON similarly to qualification
-    import json, re
-    parsed = None
-    try:
-        parsed = json.loads(text)
-    except Exception:
-        m = re.search(r"(\{.*\})", text, re.S)
-        if m:
-            try:
-                parsed = json.loads(m.group(1))
-            except Exception:
-                parsed = {"subject": "Hey", "body": text[:500], "tags": []}
-        else:
-            parsed = {"subject": "Hey", "body": text[:500], "tags": []}
+    parsed = resp["parsed"]
+    if parsed is None:
+        parsed = {"subject": "Hey", "body": resp["text"][:500], "tags": []}
+    return parsed
+
+@router.post("/outreach/{lead_id}", summary="Generate outreach message")
+async def generate_outreach(
+    lead_id: int,
+    background_tasks: BackgroundTasks,
+    tone: str = "friendly",
+    goal: str = "book a meeting",
+    session=Depends(get_session),
+):
+    lead = await run_in_threadpool(session.get, Lead, lead_id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="lead not found")
+    lead_data = _lead_prompt_data(lead)
+    prompt = outreach_prompt(lead_data, tone=tone, goal=goal)
+    # tone and goal are part of the prompt, so they are part of the cache key too
+    cache_key = llm_cache.prompt_key(prompt)
+    parsed = llm_cache.get(cache_key)
+    if parsed is None:
+        parsed = await llm_cache.coalesce(cache_key, lambda: _grok_outreach(prompt))
+        llm_cache.put(cache_key, parsed)
 
     # Log the outreach generation activity with clean details
     subject = parsed.get("subject", "No subject")
-    body_preview = parsed.get("body", "No message content")[:100]
     tags = parsed.get("tags", [])
     tags_text = ", ".join(tags) if tags else "No tags"
     clean_detail = f"AI-generated outreach message created. Subject: '{subject}'. Tags: {tags_text}"
     
-    PipelineService.log_activity(
-        session, lead.id, "system", "outreach_generated",
+    # The activity row is the only write here, so it is done after the response is sent
+    background_tasks.add_task(
+        _in_own_session,
+        PipelineService.log_activity,
+        lead_id, "system", "outreach_generated",
         clean_detail,
         {"subject": subject, "body": parsed.get("body", ""), "tags": tags}
     )
     
-    return {"lead_id": lead.id, "outreach": parsed}
+    return {"lead_id": lead_id, "outreach": parsed}
 
 # Pipeline Management Endpoints
 
+# The stage list is static, so its JSON body and ETag are built once at import
+_PIPELINE_STAGES_BODY = dumps(PipelineService.get_pipeline_stages()).encode()
+_PIPELINE_STAGES_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": '"' + hashlib.blake2b(_PIPELINE_STAGES_BODY, digest_size=8).hexdigest() + '"',
+}
+
 @router.get("/pipeline/stages", summary="Get all pipeline stages")
-def get_pipeline_stages():
+def get_pipeline_stages(if_none_match: Optional[str] = Header(None)):
     """Get all available pipeline stages with descriptions"""
-    return PipelineService.get_pipeline_stages()
+    if if_none_match == _PIPELINE_STAGES_HEADERS["ETag"]:
+        return Response(status_code=304, headers=_PIPELINE_STAGES_HEADERS)
+    return Response(content=_PIPELINE_STAGES_BODY, media_type="application/json", headers=_PIPELINE_STAGES_HEADERS)
 
 @router.get("/pipeline/stats", summary="Get pipeline statistics")
 def get_pipeline_stats(session=Depends(get_session)):
     """Get pipeline statistics showing lead counts by stage"""
-    return PipelineService.get_pipeline_stats(session)
+    return PipelineService.get_pipeline_stats_cached(session)
 
 @router.get("/pipeline/analytics", summary="Get comprehensive pipeline analytics")
 def get_pipeline_analytics(session=Depends(get_session)):
     """Get comprehensive pipeline analytics including conversion rates and recent activities"""
-    return PipelineService.get_pipeline_analytics(session)
+    return PipelineService.get_pipeline_analytics_cached(session)
 
 @router.post("/{lead_id}/progress", summary="Manually progress lead to next stage")
 def progress_lead_stage(
@@ -335,9 +653,14 @@ def progress_lead_stage(
         raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
 
 @router.get("/{lead_id}/activities", summary="Get activity history for a lead")
-def get_lead_activities(lead_id: int, session=Depends(get_session)):
-    """Get all activities for a specific lead"""
-    activities = PipelineService.get_lead_activities(session, lead_id)
+def get_lead_activities(
+    lead_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session=Depends(get_session),
+):
+    """Get activities for a specific lead, newest first, one page at a time"""
+    activities = PipelineService.get_lead_activities(session, lead_id, limit, offset)
     return [
         {
             "id": activity.id,
@@ -352,19 +675,24 @@ def get_lead_activities(lead_id: int, session=Depends(get_session)):
 # Search Endpoints
 
 @router.get("/search/all", summary="Search leads and activities")
-def search_all(
+async def search_all(
     q: str,
     search_type: str = "all",
     limit: int = 50,
-    session=Depends(get_session)
 ):
-    """Search through leads, activities, and company metadata"""
+    """Search through leads, activities, and company metadata.
+
+    The three searches are independent, so they run concurrently in worker
+    threads and the response takes as long as the slowest one.
+    """
     if not q.strip():
         return {"leads": [], "activities": [], "metadata": []}
     
-    leads = SearchService.search_leads(session, q, search_type, limit)
-    activities = SearchService.search_activities(session, q, None, limit)
-    metadata = SearchService.search_company_metadata(session, q, None, limit)
+    leads, activities, metadata = await asyncio.gather(
+        asyncio.to_thread(_in_own_session, SearchService.search_leads, q, search_type, limit),
+        asyncio.to_thread(_in_own_session, SearchService.search_activities, q, None, limit),
+        asyncio.to_thread(_in_own_session, SearchService.search_company_metadata, q, None, limit),
+    )
     
     return {
         "query": q,
@@ -457,44 +785,43 @@ def cleanup_old_activities(
     session=Depends(get_session)
 ):
     """Clean up old activities from the database"""
-    from datetime import datetime, timedelta
-    
     cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
     
-    # Get old activities by date
-    old_activities_by_date = session.exec(
-        select(ActivityLog).where(ActivityLog.created_at < cutoff_date)
-    ).all()
-    
-    # Get old activities by count per lead
-    leads = session.exec(select(Lead)).all()
-    old_activities_by_count = []
-    
-    for lead in leads:
-        activities = session.exec(
-            select(ActivityLog)
-            .where(ActivityLog.lead_id == lead.id)
-            .order_by(ActivityLog.created_at.desc())
-        ).all()
-        
-        if len(activities) > keep_recent_per_lead:
-            old_activities_by_count.extend(activities[keep_recent_per_lead:])
-    
-    # Combine and deduplicate by ID
-    all_old_activity_ids = set()
-    all_old_activities = []
-    
-    for activity in old_activities_by_date + old_activities_by_count:
-        if activity.id not in all_old_activity_ids:
-            all_old_activity_ids.add(activity.id)
-            all_old_activities.append(activity)
+    # Rank each lead's activities newest-first in SQL; anything past
+    # keep_recent_per_lead or older than the cutoff is a candidate
+    ranked = select(
+        ActivityLog.id,
+        ActivityLog.lead_id,
+        ActivityLog.action,
+        ActivityLog.created_at,
+        func.row_number().over(
+            partition_by=ActivityLog.lead_id,
+            order_by=(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+        ).label("rn")
+    ).subquery()
+    by_date = ranked.c.created_at < cutoff_date
+    by_count = ranked.c.rn > keep_recent_per_lead
     
     if dry_run:
+        # Counts are aggregated in SQL; only the preview rows are fetched
+        total, old_by_date, old_by_count = session.exec(
+            select(
+                func.count(),
+                func.coalesce(func.sum(case((by_date, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((by_count, 1), else_=0)), 0),
+            ).where(or_(by_count, by_date))
+        ).one()
+        preview = session.exec(
+            select(ranked.c.id, ranked.c.lead_id, ranked.c.action, ranked.c.created_at)
+            .where(or_(by_count, by_date))
+            .order_by(ranked.c.created_at)
+            .limit(10)
+        ).all()
         return {
             "message": "Dry run - no activities deleted",
-            "old_activities_by_date": len(old_activities_by_date),
-            "old_activities_by_count": len(old_activities_by_count),
-            "total_to_delete": len(all_old_activities),
+            "old_activities_by_date": old_by_date,
+            "old_activities_by_count": old_by_count,
+            "total_to_delete": total,
             "activities_preview": [
                 {
                     "id": activity.id,
@@ -502,16 +829,15 @@ def cleanup_old_activities(
                     "action": activity.action,
                     "created_at": activity.created_at.isoformat()
                 }
-                for activity in all_old_activities[:10]
+                for activity in preview
             ]
         }
     else:
-        # Actually delete the activities
-        deleted_count = 0
-        for activity in all_old_activities:
-            session.delete(activity)
-            deleted_count += 1
-        
+        # Actually delete the activities in a single DELETE ... WHERE id IN (subquery)
+        result = session.exec(
+            delete(ActivityLog).where(ActivityLog.id.in_(select(ranked.c.id).where(or_(by_count, by_date))))
+        )
+        deleted_count = result.rowcount
         session.commit()
         
         return {
@@ -522,30 +848,25 @@ def cleanup_old_activities(
 @router.get("/activities/summary", summary="Get activity summary")
 def get_activity_summary(session=Depends(get_session)):
     """Get a summary of current activities in the database"""
-    # Get total activity count
-    total_activities = session.exec(select(ActivityLog)).all()
-    
-    # Get activities by lead
-    leads = session.exec(select(Lead)).all()
-    activities_by_lead = []
-    
-    for lead in leads:
-        activities = session.exec(
-            select(ActivityLog).where(ActivityLog.lead_id == lead.id)
-        ).all()
-        activities_by_lead.append({
-            "lead_id": lead.id,
-            "company": lead.company,
-            "activity_count": len(activities)
-        })
+    # Activity count per lead, including leads with none (outer join)
+    per_lead = session.exec(
+        select(Lead.id, Lead.company, func.count(ActivityLog.id))
+        .outerjoin(ActivityLog, ActivityLog.lead_id == Lead.id)
+        .group_by(Lead.id, Lead.company)
+        .order_by(Lead.id)
+    ).all()
+    activities_by_lead = [
+        {"lead_id": lead_id, "company": company, "activity_count": count}
+        for lead_id, company, count in per_lead
+    ]
     
     # Get activities by type
-    activity_types = {}
-    for activity in total_activities:
-        activity_types[activity.action] = activity_types.get(activity.action, 0) + 1
+    activity_types = dict(session.exec(
+        select(ActivityLog.action, func.count(ActivityLog.id)).group_by(ActivityLog.action)
+    ).all())
     
     return {
-        "total_activities": len(total_activities),
+        "total_activities": sum(activity_types.values()),
         "activities_by_lead": activities_by_lead,
         "activities_by_type": activity_types
     }
@@ -556,13 +877,13 @@ def clear_all_activities(
     session=Depends(get_session)
 ):
     """Remove all activities from all leads"""
-    # Get all activities
-    all_activities = session.exec(select(ActivityLog)).all()
-    
     if dry_run:
+        # Count in SQL and fetch only the preview rows
+        total_activities = session.exec(select(func.count(ActivityLog.id))).one()
+        preview = session.exec(select(ActivityLog).order_by(ActivityLog.id).limit(10)).all()
         return {
             "message": "Dry run - no activities deleted",
-            "total_activities": len(all_activities),
+            "total_activities": total_activities,
             "activities_preview": [
                 {
                     "id": activity.id,
@@ -570,15 +891,13 @@ def clear_all_activities(
                     "action": activity.action,
                     "created_at": activity.created_at.isoformat()
                 }
-                for activity in all_activities[:10]
+                for activity in preview
             ]
         }
     else:
-        # Actually delete all activities
-        deleted_count = 0
-        for activity in all_activities:
-            session.delete(activity)
-            deleted_count += 1
+        # Actually delete all activities in a single statement
+        result = session.exec(delete(ActivityLog))
+        deleted_count = result.rowcount
         
         session.commit()
         
@@ -1,8 +1,9 @@
 # backend/app/schemas.py
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Annotated, Dict, Optional, List, Union
 from datetime import datetime
 from app.models import PipelineStage
+from app._json import loads
 
 class LeadCreate(BaseModel):
     company: str
@@ -23,7 +24,17 @@ class LeadUpdate(BaseModel):
     company_metadata: Optional[dict] = None
     stage: Optional[PipelineStage] = None
 
+    @field_validator("company", "stage")
+    @classmethod
+    def _not_null(cls, value):
+        # May be omitted, but an explicit null would violate NOT NULL columns
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class LeadRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     company: str
     name: Optional[str]
@@ -31,14 +42,36 @@ class LeadRead(BaseModel):
     email: Optional[str]
     phone: Optional[str]
     website: Optional[str]
-    company_metadata: Optional[str]  # JSON string
+    company_metadata: Optional[dict]  # JSON/JSONB column, already a dict from the ORM
     score: Optional[float]
     stage: PipelineStage
     created_at: datetime
 
+    @field_validator("company_metadata", mode="before")
+    @classmethod
+    def _decode_legacy_metadata(cls, value):
+        # Rows written while the column was TEXT may still decode to a
+        # JSON-encoded string rather than an object; decode that second layer
+        if not isinstance(value, str):
+            return value
+        if not value:
+            return None
+        try:
+            return loads(value)
+        except ValueError:
+            # Unparseable legacy value: same fallback as SearchService
+            return {}
+
+# Per-criterion weights, each a number from 1 to 10 (ints stay ints so prompts read "weight: 3")
+ScoringWeights = Dict[str, Annotated[Union[int, float], Field(ge=1, le=10)]]
+
 class QualificationRequest(BaseModel):
     lead_id: int
-    scoring_weights: Optional[dict] = {}  # user-driven weights, e.g., {"company_size":2,"industry_fit":3}
+    scoring_weights: Optional[ScoringWeights] = None  # user-driven weights, e.g., {"company_size":2,"industry_fit":3}
+
+class BulkQualificationRequest(BaseModel):
+    lead_ids: List[int]
+    scoring_weights: Optional[ScoringWeights] = None
 
 class StageProgressionRequest(BaseModel):
     new_stage: PipelineStage
@@ -1,9 +1,11 @@
 # backend/app/search_service.py
-from typing import List, Dict, Optional, Any
+import heapq
+import re
+from typing import List, Dict, Optional, Any, Tuple
 from sqlmodel import Session, select, or_, and_
+from sqlalchemy import Text, case, cast
 from app.models import Lead, ActivityLog
-import json
-import re
+from app._json import loads
 from datetime import datetime
 
 class SearchService:
@@ -25,7 +27,6 @@ class SearchService:
             search_type: Type of search ("all", "company", "contact", "metadata")
             limit: Maximum number of results
         """
-        query_lower = query.lower()
         results = []
         
         # Build search conditions based on type
@@ -40,27 +41,20 @@ class SearchService:
             conditions.append(Lead.email.ilike(f"%{query}%"))
         
         if search_type in ["all", "metadata"]:
-            conditions.append(Lead.company_metadata.ilike(f"%{query}%"))
+            conditions.append(cast(Lead.company_metadata, Text).ilike(f"%{query}%"))
         
-        # Execute search
+        # Execute search; the DB scores, ranks and limits the matches
         if conditions:
-            leads = session.exec(
-                select(Lead)
+            relevance = SearchService._relevance_expr(query)
+            rows = session.exec(
+                select(Lead, relevance.label("relevance_score"), SearchService._match_type_expr(query))
                 .where(or_(*conditions))
+                .order_by(relevance.desc(), Lead.id)
                 .limit(limit)
             ).all()
             
-            for lead in leads:
-                # Calculate relevance score
-                relevance_score = SearchService._calculate_relevance_score(lead, query_lower)
-                
-                # Parse company metadata for better display
-                metadata = {}
-                if lead.company_metadata:
-                    try:
-                        metadata = json.loads(lead.company_metadata)
-                    except:
-                        metadata = {}
+            for lead, relevance_score, match_type in rows:
+                metadata = SearchService._metadata_dict(lead.company_metadata)
                 
                 results.append({
                     "id": lead.id,
@@ -74,12 +68,10 @@ class SearchService:
                     "stage": lead.stage,
                     "created_at": lead.created_at.isoformat(),
                     "company_metadata": metadata,
-                    "relevance_score": relevance_score,
-                    "match_type": SearchService._get_match_type(lead, query_lower)
+                    "relevance_score": float(relevance_score),
+                    "match_type": match_type
                 })
         
-        # Sort by relevance score
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
         return results
     
     @staticmethod
@@ -113,44 +105,41 @@ class SearchService:
         if lead_id:
             conditions.append(ActivityLog.lead_id == lead_id)
         
-        # Execute search
-        activities = session.exec(
-            select(ActivityLog)
+        # Execute search, joining in each activity's lead company for context
+        rows = session.exec(
+            select(ActivityLog, Lead.company)
+            .join(Lead, Lead.id == ActivityLog.lead_id, isouter=True)
             .where(and_(*conditions))
             .order_by(ActivityLog.created_at.desc())
             .limit(limit)
         ).all()
         
-        for activity in activities:
-            # Get lead info for context
-            lead = session.get(Lead, activity.lead_id)
-            
-            # Calculate relevance score
-            relevance_score = SearchService._calculate_activity_relevance(activity, query_lower)
+        for activity, lead_company in rows:
+            # Calculate relevance score and match type in one pass
+            relevance_score, match_type = SearchService._activity_score_and_type(activity, query_lower)
             
             # Parse activity detail if it's JSON
             detail_parsed = activity.detail
             try:
                 if activity.detail and activity.detail.startswith('{'):
-                    detail_parsed = json.loads(activity.detail)
-            except:
+                    detail_parsed = loads(activity.detail)
+            except ValueError:
                 pass
             
             results.append({
                 "id": activity.id,
                 "lead_id": activity.lead_id,
-                "lead_company": lead.company if lead else "Unknown",
+                "lead_company": lead_company or "Unknown",
                 "actor": activity.actor,
                 "action": activity.action,
                 "detail": detail_parsed,
                 "created_at": activity.created_at.isoformat(),
                 "relevance_score": relevance_score,
-                "match_type": SearchService._get_activity_match_type(activity, query_lower)
+                "match_type": match_type
             })
         
-        # Sort by relevance score
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return results
+        # Highest relevance first
+        return heapq.nlargest(limit, results, key=lambda x: x["relevance_score"])
     
     @staticmethod
     def search_company_metadata(
@@ -168,24 +157,32 @@ class SearchService:
             metadata_field: Specific metadata field to search (e.g., "industry", "tech_stack")
             limit: Maximum number of results
         """
-        query_lower = query.lower()
+        matches = re.compile(re.escape(query), re.IGNORECASE).search
         results = []
         
-        # Get all leads with metadata
-        leads = session.exec(select(Lead).where(Lead.company_metadata.isnot(None))).all()
+        # Let the DB filter candidates: on the extracted field (->> on Postgres)
+        # when one is given, otherwise on the whole metadata text
+        if metadata_field:
+            leads = session.exec(
+                select(Lead)
+                .where(Lead.company_metadata[metadata_field].as_string().ilike(f"%{query}%"))
+                .limit(limit)
+            ).all()
+        else:
+            # Not limited in SQL (a lead can match several fields, or only a key
+            # name); iterated lazily and abandoned once enough fields matched
+            leads = session.exec(
+                select(Lead).where(cast(Lead.company_metadata, Text).ilike(f"%{query}%"))
+            )
         
         for lead in leads:
-            if not lead.company_metadata:
-                continue
-                
-            try:
-                metadata = json.loads(lead.company_metadata)
-            except:
-                continue
+            if len(results) >= limit:
+                break
+            metadata = SearchService._metadata_dict(lead.company_metadata)
             
             # Search in specific field or all fields
             if metadata_field:
-                if metadata_field in metadata and query_lower in str(metadata[metadata_field]).lower():
+                if metadata_field in metadata and matches(str(metadata[metadata_field])):
                     results.append({
                         "lead_id": lead.id,
                         "company": lead.company,
@@ -197,7 +194,9 @@ class SearchService:
             else:
                 # Search in all metadata fields
                 for field, value in metadata.items():
-                    if query_lower in str(value).lower():
+                    if len(results) >= limit:
+                        break
+                    if matches(str(value)):
                         results.append({
                             "lead_id": lead.id,
                             "company": lead.company,
@@ -207,9 +206,8 @@ class SearchService:
                             "relevance_score": 1.0
                         })
         
-        # Sort by relevance score
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return results[:limit]
+        # Highest relevance first
+        return heapq.nlargest(limit, results, key=lambda x: x["relevance_score"])
     
     @staticmethod
     def get_search_suggestions(session: Session, query: str) -> Dict[str, List[str]]:
@@ -220,7 +218,7 @@ class SearchService:
             session: Database session
             query: Partial search query
         """
-        query_lower = query.lower()
+        matches = re.compile(re.escape(query), re.IGNORECASE).search
         suggestions = {
             "companies": [],
             "contacts": [],
@@ -244,29 +242,31 @@ class SearchService:
         ).all()
         suggestions["contacts"] = [c for c in contacts if c]
         
-        # Get industry suggestions from metadata
+        # Get industry suggestions from metadata; only rows whose metadata text
+        # contains the query can contribute, so only those are fetched and decoded
         leads_with_metadata = session.exec(
             select(Lead.company_metadata)
-            .where(Lead.company_metadata.isnot(None))
+            .where(cast(Lead.company_metadata, Text).ilike(f"%{query}%"))
         ).all()
         
         industries = set()
         tech_stacks = set()
         
-        for metadata_str in leads_with_metadata:
+        for metadata_value in leads_with_metadata:
+            metadata = SearchService._metadata_dict(metadata_value)
             try:
-                metadata = json.loads(metadata_str)
-                if "industry" in metadata and query_lower in str(metadata["industry"]).lower():
+                if "industry" in metadata and matches(str(metadata["industry"])):
                     industries.add(metadata["industry"])
                 if "tech_stack" in metadata:
                     tech_stack = metadata["tech_stack"]
                     if isinstance(tech_stack, list):
                         for tech in tech_stack:
-                            if query_lower in str(tech).lower():
+                            if matches(str(tech)):
                                 tech_stacks.add(tech)
-                    elif query_lower in str(tech_stack).lower():
+                    elif matches(str(tech_stack)):
                         tech_stacks.add(tech_stack)
-            except:
+            except TypeError:
+                # Unhashable (nested) values can't be suggested
                 continue
         
         suggestions["industries"] = list(industries)
@@ -275,77 +275,62 @@ class SearchService:
         return suggestions
     
     @staticmethod
-    def _calculate_relevance_score(lead: Lead, query: str) -> float:
-        """Calculate relevance score for a lead based on search query"""
-        score = 0.0
-        
-        # Company name match (highest weight)
-        if query in lead.company.lower():
-            score += 10.0
-            if lead.company.lower().startswith(query):
-                score += 5.0
-        
-        # Contact name match
-        if lead.name and query in lead.name.lower():
-            score += 8.0
-        
-        # Title match
-        if lead.title and query in lead.title.lower():
-            score += 6.0
-        
-        # Email match
-        if lead.email and query in lead.email.lower():
-            score += 7.0
-        
-        # Metadata match
-        if lead.company_metadata and query in lead.company_metadata.lower():
-            score += 4.0
-        
-        return score
+    def _metadata_dict(value: Any) -> Dict[str, Any]:
+        """company_metadata as a dict (also accepts legacy JSON strings)"""
+        if isinstance(value, dict):
+            return value
+        if isinstance(value, str) and value:
+            try:
+                metadata = loads(value)
+            except ValueError:
+                return {}
+            return metadata if isinstance(metadata, dict) else {}
+        return {}
     
     @staticmethod
-    def _calculate_activity_relevance(activity: ActivityLog, query: str) -> float:
-        """Calculate relevance score for an activity based on search query"""
-        score = 0.0
-        
-        # Action match
-        if query in activity.action.lower():
-            score += 5.0
-        
-        # Detail match (highest weight)
-        if query in activity.detail.lower():
-            score += 10.0
-        
-        # Actor match
-        if query in activity.actor.lower():
-            score += 3.0
-        
+    def _lead_match_columns(query: str) -> List[tuple]:
+        """(match type, relevance weight, SQL condition) for each searchable lead field"""
+        pattern = f"%{query}%"
+        return [
+            ("company", 10, Lead.company.ilike(pattern)),
+            ("contact", 8, Lead.name.ilike(pattern)),
+            ("title", 6, Lead.title.ilike(pattern)),
+            ("email", 7, Lead.email.ilike(pattern)),
+            ("metadata", 4, cast(Lead.company_metadata, Text).ilike(pattern)),
+        ]
+    
+    @staticmethod
+    def _relevance_expr(query: str):
+        """SQL relevance score for a lead; company prefix matches get a bonus"""
+        score = case((Lead.company.ilike(f"{query}%"), 5), else_=0)
+        for _, weight, condition in SearchService._lead_match_columns(query):
+            score = score + case((condition, weight), else_=0)
         return score
     
     @staticmethod
-    def _get_match_type(lead: Lead, query: str) -> str:
-        """Determine what type of match was found for a lead"""
-        if query in lead.company.lower():
-            return "company"
-        elif lead.name and query in lead.name.lower():
-            return "contact"
-        elif lead.title and query in lead.title.lower():
-            return "title"
-        elif lead.email and query in lead.email.lower():
-            return "email"
-        elif lead.company_metadata and query in lead.company_metadata.lower():
-            return "metadata"
-        else:
-            return "unknown"
+    def _match_type_expr(query: str):
+        """SQL expression naming the first field (in priority order) the query matched"""
+        return case(
+            *[(condition, match_type) for match_type, _, condition in SearchService._lead_match_columns(query)],
+            else_="unknown",
+        )
     
     @staticmethod
-    def _get_activity_match_type(activity: ActivityLog, query: str) -> str:
-        """Determine what type of match was found for an activity"""
-        if query in activity.action.lower():
-            return "action"
-        elif query in activity.detail.lower():
-            return "detail"
-        elif query in activity.actor.lower():
-            return "actor"
+    def _activity_score_and_type(activity: ActivityLog, query: str) -> Tuple[float, str]:
+        """Relevance score for an activity and the first field (action, detail, actor) matched"""
+        in_action = query in activity.action.lower()
+        in_detail = query in (activity.detail or "").lower()
+        in_actor = query in activity.actor.lower()
+        
+        # Detail match has the highest weight
+        score = 5.0 * in_action + 10.0 * in_detail + 3.0 * in_actor
+        
+        if in_action:
+            match_type = "action"
+        elif in_detail:
+            match_type = "detail"
+        elif in_actor:
+            match_type = "actor"
         else:
-            return "unknown"
+            match_type = "unknown"
+        return score, match_type
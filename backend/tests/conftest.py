@@ -0,0 +1,74 @@
+# backend/tests/conftest.py
+import json
+import os
+import tempfile
+
+# Configure the app before it is imported: a throwaway SQLite database and a
+# dummy Grok key (all Grok traffic goes to the mock transport below)
+_DB_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["GROK_API_KEY"] = "test-key"
+os.environ.pop("GROK_CACHE", None)
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app import database, grok_client, llm_cache, pipeline_service
+from app.main import app
+
+QUALIFICATION_TEXT = 'Result: {"score": 85, "justification": "Strong fit", "breakdown": {}} done'
+
+class FakeGrok:
+    """Serves Grok chat completions (plain and streamed) from canned text
+    and records the prompt of every request"""
+
+    def __init__(self):
+        self.prompts = []
+        self.reply = lambda prompt: QUALIFICATION_TEXT
+        # Status codes (or transport exceptions) to answer with before replying normally
+        self.failures = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        prompt = body["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure, text="unavailable")
+        text = self.reply(prompt)
+        if not body.get("stream"):
+            return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+        events = "".join(
+            "data: " + json.dumps({"choices": [{"delta": {"content": text[i:i + 8]}}]}) + "\n\n"
+            for i in range(0, len(text), 8)
+        )
+        return httpx.Response(200, content=(events + "data: [DONE]\n\n").encode())
+
+@pytest.fixture
+def fake_grok(monkeypatch):
+    fake = FakeGrok()
+    transport = httpx.MockTransport(fake.handler)
+
+    class MockedAsyncClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    # Every AsyncClient the app opens (per request or shared) talks to the fake
+    monkeypatch.setattr(httpx, "AsyncClient", MockedAsyncClient)
+    monkeypatch.setattr(grok_client, "_ASYNC_CLIENT", None, raising=False)
+    return fake
+
+@pytest.fixture
+def client():
+    # Fresh schema and caches for every test
+    SQLModel.metadata.drop_all(database.engine)
+    database._missing_indexes.clear()
+    llm_cache.clear()
+    pipeline_service._stats_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,79 @@
+# backend/tests/test_grok_client.py
+import asyncio
+
+import httpx
+import pytest
+
+from app import grok_client
+from app.grok_client import GrokError, _BraceScanner, acall_grok_json, call_grok_async, extract_json
+
+def test_extract_json_direct():
+    assert extract_json('{"score": 1}') == {"score": 1}
+
+def test_extract_json_with_surrounding_prose():
+    assert extract_json('Here you go: {"a": {"b": "}"}} Hope it helps {"c": 2}') == {"a": {"b": "}"}}
+
+def test_extract_json_skips_invalid_blocks():
+    assert extract_json('{not json} then {"ok": true}') == {"ok": True}
+
+def test_extract_json_without_object():
+    assert extract_json("no json here") is None
+    assert extract_json('{"unterminated": 1') is None
+
+def test_brace_scanner_across_chunks():
+    scanner = _BraceScanner()
+    assert scanner.feed('prefix {"a": "{') == []
+    assert scanner.feed('\\"x"') == []
+    assert scanner.feed(', "b": [1, {"c": 2}]}') == ['{"a": "{\\"x", "b": [1, {"c": 2}]}']
+    assert scanner.feed(' {"d": 3}') == ['{"d": 3}']
+
+def test_acall_grok_json_stops_at_first_object(fake_grok):
+    fake_grok.reply = lambda prompt: 'ok {"score": 5} trailing text that is never read'
+    result = asyncio.run(acall_grok_json("prompt"))
+    assert result["parsed"] == {"score": 5}
+    assert "never read" not in result["text"]
+
+def test_acall_grok_json_uses_disk_cache(fake_grok, monkeypatch, tmp_path):
+    monkeypatch.setattr(grok_client, "_CACHE_ENABLED", True)
+    monkeypatch.setattr(grok_client, "_CACHE_DIR", str(tmp_path))
+    fake_grok.reply = lambda prompt: '{"score": 5}'
+    first = asyncio.run(acall_grok_json("prompt"))
+    second = asyncio.run(acall_grok_json("prompt"))
+    assert first["parsed"] == second["parsed"] == {"score": 5}
+    assert len(fake_grok.prompts) == 1
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(grok_client, "_RETRY_BACKOFF", 0)
+
+def test_acall_grok_json_retries_transient_errors(fake_grok, no_backoff):
+    fake_grok.failures = [503, 429]
+    assert asyncio.run(acall_grok_json("prompt"))["parsed"]["score"] == 85
+    assert len(fake_grok.prompts) == 3
+
+def test_acall_grok_json_retries_connection_errors(fake_grok, no_backoff):
+    fake_grok.failures = [httpx.ConnectError("refused")]
+    assert asyncio.run(acall_grok_json("prompt"))["parsed"]["score"] == 85
+    assert len(fake_grok.prompts) == 2
+
+def test_acall_grok_json_gives_up_after_retries(fake_grok, no_backoff):
+    fake_grok.failures = [503] * 4
+    with pytest.raises(GrokError, match="503"):
+        asyncio.run(acall_grok_json("prompt"))
+    assert len(fake_grok.prompts) == 4
+
+def test_acall_grok_json_does_not_retry_client_errors(fake_grok, no_backoff):
+    fake_grok.failures = [400]
+    with pytest.raises(GrokError, match="400"):
+        asyncio.run(acall_grok_json("prompt"))
+    assert len(fake_grok.prompts) == 1
+
+def test_call_grok_async_retries_transient_errors(fake_grok, no_backoff):
+    fake_grok.failures = [502]
+
+    async def call():
+        async with httpx.AsyncClient() as client:
+            return await call_grok_async(client, "prompt")
+
+    assert extract_json(asyncio.run(call())["text"])["score"] == 85
+    assert len(fake_grok.prompts) == 2
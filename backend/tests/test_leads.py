@@ -0,0 +1,139 @@
+# backend/tests/test_leads.py
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import database
+from app.models import Lead
+
+def _create(client, company, **fields):
+    return client.post("/leads/", json={"company": company, **fields})
+
+def _insert_raw(company, email=None) -> int:
+    """Insert a lead directly, bypassing the API's duplicate checks"""
+    with Session(database.engine) as session:
+        lead = Lead(company=company, email=email)
+        session.add(lead)
+        session.commit()
+        return lead.id
+
+def _drop_company_index():
+    """Simulate a database where init_db could not build uq_lead_company_lower"""
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_lead_company_lower"))
+    database._missing_indexes.add("uq_lead_company_lower")
+
+def test_create_duplicate_company_returns_409(client):
+    assert _create(client, "Acme").status_code == 200
+    response = _create(client, "ACME")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Lead with company 'ACME' already exists"
+
+def test_create_requires_company(client):
+    assert _create(client, "   ").status_code == 400
+
+def test_update_onto_existing_company_returns_409(client):
+    _create(client, "Acme")
+    lead_id = _create(client, "Beta").json()["id"]
+    response = client.put(f"/leads/{lead_id}", json={"company": "acme"})
+    assert response.status_code == 409
+    # The failed update is rolled back
+    assert client.get(f"/leads/{lead_id}").json()["company"] == "Beta"
+
+def test_update_rejects_null_company_and_stage(client):
+    lead_id = _create(client, "Acme").json()["id"]
+    assert client.put(f"/leads/{lead_id}", json={"company": None}).status_code == 422
+    assert client.put(f"/leads/{lead_id}", json={"stage": None}).status_code == 422
+
+def test_update_lead(client):
+    lead_id = _create(client, "Acme").json()["id"]
+    response = client.put(f"/leads/{lead_id}", json={"company": "ACME", "title": "CTO"})
+    assert response.status_code == 200
+    assert (response.json()["company"], response.json()["title"]) == ("ACME", "CTO")
+    assert client.put("/leads/999", json={"title": "CTO"}).status_code == 404
+
+def test_duplicate_checks_without_unique_index(client):
+    _create(client, "Acme")
+    beta_id = _create(client, "Beta").json()["id"]
+    _drop_company_index()
+    assert _create(client, "acme").status_code == 409
+    assert client.put(f"/leads/{beta_id}", json={"company": "ACME"}).status_code == 409
+    assert client.put(f"/leads/{beta_id}", json={"company": "BETA"}).status_code == 200
+    response = client.post("/leads/bulk", json=[{"company": "acme"}, {"company": "New"}, {"company": "NEW"}])
+    assert [lead["company"] for lead in response.json()["created"]] == ["New"]
+    assert response.json()["skipped"] == ["acme", "NEW"]
+
+def test_bulk_create_skips_existing_and_repeated_companies(client):
+    _create(client, "Acme")
+    response = client.post("/leads/bulk", json=[
+        {"company": "acme"},
+        {"company": "Beta", "email": "b@beta.io"},
+        {"company": "BETA"},
+        {"company": "Gamma"},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [lead["company"] for lead in body["created"]] == ["Beta", "Gamma"]
+    assert body["skipped"] == ["acme", "BETA"]
+    activities = client.get(f"/leads/{body['created'][0]['id']}/activities").json()
+    assert [activity["action"] for activity in activities] == ["lead_created"]
+
+def test_bulk_create_empty(client):
+    assert client.post("/leads/bulk", json=[]).json() == {"created": [], "skipped": []}
+
+def test_list_duplicates(client):
+    _drop_company_index()
+    acme_ids = [
+        _insert_raw("Acme", "a@acme.io"),
+        _insert_raw("acme", "a@acme.io"),
+        _insert_raw("ACME", "other@acme.io"),
+    ]
+    beta_ids = [_insert_raw("Beta") for _ in range(2)]
+    _insert_raw("Gamma")
+    response = client.get("/leads/duplicates")
+    assert response.status_code == 200
+    groups = response.json()
+    # Grouped on lower(company), the key of uq_lead_company_lower, whatever the email
+    assert [group["company"] for group in groups] == ["ACME", "Beta"]
+    assert [lead["id"] for lead in groups[0]["leads"]] == acme_ids[::-1]
+    assert [lead["company"] for lead in groups[0]["leads"]] == ["ACME", "acme", "Acme"]
+    assert [lead["id"] for lead in groups[1]["leads"]] == beta_ids[::-1]
+
+def test_list_keyset_pagination(client):
+    ids = [_create(client, f"Company {i}").json()["id"] for i in range(5)]
+    seen = []
+    url = "/leads/?limit=2"
+    while url:
+        response = client.get(url)
+        seen.extend(lead["id"] for lead in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/leads/?limit=2&{cursor}" if cursor else None
+    assert seen == ids[::-1]
+
+def test_list_offset_pagination(client):
+    ids = [_create(client, f"Company {i}").json()["id"] for i in range(3)]
+    response = client.get("/leads/?limit=2&offset=2")
+    assert [lead["id"] for lead in response.json()] == ids[:1]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_cursor_header_is_exposed_to_browsers(client):
+    response = client.get("/leads/", headers={"Origin": "http://localhost:5173"})
+    assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
+
+def test_lead_activities_pages(client):
+    lead_id = _create(client, "Acme").json()["id"]
+    for title in ("CEO", "CTO"):
+        client.put(f"/leads/{lead_id}", json={"title": title})
+    everything = client.get(f"/leads/{lead_id}/activities").json()
+    assert [activity["action"] for activity in everything] == ["updated lead", "updated lead", "lead_created"]
+    pages = [client.get(f"/leads/{lead_id}/activities?limit=2&offset={offset}").json() for offset in (0, 2, 4)]
+    assert [len(page) for page in pages] == [2, 1, 0]
+    assert pages[0] + pages[1] == everything
+
+def test_pipeline_stats_refresh_after_commit(client):
+    assert client.get("/leads/pipeline/stats").json()["New"] == 0
+    lead_id = _create(client, "Acme").json()["id"]
+    assert client.get("/leads/pipeline/stats").json()["New"] == 1
+    client.post(f"/leads/{lead_id}/progress", json={"new_stage": "Contacted"})
+    stats = client.get("/leads/pipeline/stats").json()
+    assert (stats["New"], stats["Contacted"]) == (0, 1)
+    assert client.get("/leads/pipeline/analytics").json()["total_leads"] == 1
@@ -0,0 +1,55 @@
+# backend/tests/test_llm_cache.py
+import asyncio
+
+import pytest
+
+from app import llm_cache
+
+@pytest.fixture(autouse=True)
+def _clear():
+    yield
+    llm_cache.clear()
+
+def test_get_put():
+    key = llm_cache.prompt_key("prompt")
+    assert llm_cache.get(key) is None
+    llm_cache.put(key, {"score": 1})
+    assert llm_cache.get(key) == {"score": 1}
+    assert llm_cache.prompt_key("other prompt") != key
+
+def test_coalesce_shares_one_call():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"score": 1}
+
+    async def main():
+        return await asyncio.gather(*[llm_cache.coalesce("key", call) for _ in range(3)])
+
+    assert asyncio.run(main()) == [{"score": 1}] * 3
+    assert len(calls) == 1
+    assert not llm_cache._inflight
+
+def test_coalesce_shares_exceptions():
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*[llm_cache.coalesce("key", call) for _ in range(2)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not llm_cache._inflight
+
+def test_coalesce_calls_again_once_finished():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return len(calls)
+
+    assert asyncio.run(llm_cache.coalesce("key", call)) == 1
+    assert asyncio.run(llm_cache.coalesce("key", call)) == 2
@@ -0,0 +1,21 @@
+# backend/tests/test_prompts.py
+from app.prompts import outreach_prompt, qualification_prompt
+
+LEAD = {"company": "Acme", "name": "Jo", "title": "CTO", "email": None, "website": None, "company_metadata": None}
+
+def test_qualification_prompt_is_memoized():
+    assert qualification_prompt(LEAD, {"company_size": 3}) is qualification_prompt(dict(LEAD), {"company_size": 3})
+
+def test_qualification_prompt_keeps_weight_types_apart():
+    as_float = qualification_prompt(LEAD, {"company_size": 2.0})
+    as_int = qualification_prompt(LEAD, {"company_size": 2})
+    assert "(weight: 2.0)" in as_float
+    assert "(weight: 2)" in as_int and "(weight: 2.0)" not in as_int
+
+def test_outreach_prompt_keeps_value_types_apart():
+    assert "'score': True" in outreach_prompt({**LEAD, "score": True})
+    assert "'score': 1" in outreach_prompt({**LEAD, "score": 1})
+
+def test_unhashable_values_are_not_cached():
+    lead = {**LEAD, "company_metadata": {"industry": "SaaS"}}
+    assert "'industry': 'SaaS'" in outreach_prompt(lead)
@@ -0,0 +1,33 @@
+# backend/tests/test_qualify.py
+def _create(client, company):
+    return client.post("/leads/", json={"company": company}).json()["id"]
+
+def test_qualify_caches_identical_prompts(client, fake_grok):
+    lead_id = _create(client, "Acme")
+    first = client.post("/leads/qualify", json={"lead_id": lead_id})
+    second = client.post("/leads/qualify", json={"lead_id": lead_id})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["score"] == second.json()["score"] == 85
+    assert len(fake_grok.prompts) == 1
+
+def test_qualify_bulk(client, fake_grok):
+    fake_grok.reply = lambda prompt: "no json here" if "Broken" in prompt else 'Result: {"score": 85, "justification": "Strong fit"}'
+    good_id, broken_id = _create(client, "Acme"), _create(client, "Broken Co")
+    response = client.post("/leads/qualify_bulk", json={"lead_ids": [good_id, broken_id, 999]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["not_found"] == [999]
+    results = {result["lead_id"]: result for result in body["results"]}
+    assert results[good_id]["score"] == 85
+    assert results[good_id]["stage"] == client.get(f"/leads/{good_id}").json()["stage"]
+    assert "invalid response format" in results[broken_id]["error"]
+    actions = [activity["action"] for activity in client.get(f"/leads/{good_id}/activities").json()]
+    assert "qualification_completed" in actions
+    assert client.get(f"/leads/{broken_id}").json()["score"] == 0
+
+def test_qualify_bulk_shares_the_qualify_cache(client, fake_grok):
+    lead_id = _create(client, "Acme")
+    client.post("/leads/qualify", json={"lead_id": lead_id})
+    response = client.post("/leads/qualify_bulk", json={"lead_ids": [lead_id]})
+    assert response.json()["results"][0]["score"] == 85
+    assert len(fake_grok.prompts) == 1
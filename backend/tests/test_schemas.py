@@ -0,0 +1,18 @@
+# backend/tests/test_schemas.py
+from datetime import datetime
+
+from app.models import Lead
+from app.schemas import LeadRead
+
+def _read(company_metadata):
+    lead = Lead(id=1, company="Acme", company_metadata=company_metadata, created_at=datetime(2024, 1, 1))
+    return LeadRead.model_validate(lead).company_metadata
+
+def test_metadata_from_json_column_passes_through():
+    assert _read({"industry": "SaaS"}) == {"industry": "SaaS"}
+    assert _read(None) is None
+
+def test_legacy_string_metadata_is_decoded():
+    assert _read('{"industry": "SaaS"}') == {"industry": "SaaS"}
+    assert _read("") is None
+    assert _read("not json") == {}
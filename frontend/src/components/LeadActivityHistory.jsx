@@ -1,5 +1,24 @@
 import React, { useState, useEffect } from 'react';
 
+const ACTIVITIES_PAGE_SIZE = 1000;
+
+// GET /leads/{id}/activities returns one page (newest first); keep requesting
+// pages until a short one comes back
+async function fetchAllActivities(leadId) {
+  const activities = [];
+  for (let offset = 0; ; offset += ACTIVITIES_PAGE_SIZE) {
+    const response = await fetch(`/api/leads/${leadId}/activities?limit=${ACTIVITIES_PAGE_SIZE}&offset=${offset}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch activities: ${response.status}`);
+    }
+    const page = await response.json();
+    activities.push(...page);
+    if (page.length < ACTIVITIES_PAGE_SIZE) {
+      return activities;
+    }
+  }
+}
+
 export default function LeadActivityHistory({ leadId }) {
   const [activities, setActivities] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -13,9 +32,7 @@ export default function LeadActivityHistory({ leadId }) {
 
   const fetchActivities = async () => {
     try {
-      const response = await fetch(`/api/leads/${leadId}/activities`);
-      const data = await response.json();
-      setActivities(data);
+      setActivities(await fetchAllActivities(leadId));
     } catch (error) {
       console.error('Error fetching activities:', error);
     } finally {
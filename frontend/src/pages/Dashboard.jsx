@@ -5,6 +5,23 @@ import PipelineDashboard from "../components/PipelineDashboard";
 import SearchSystem from "../components/SearchSystem";
 import { useScoringWeights } from "../contexts/ScoringWeightsContext";
 
+// GET /leads returns one page at a time; follow the X-Next-Cursor header
+// (keyset pagination) until the last page
+async function fetchAllLeads() {
+  const leads = [];
+  let url = "/api/leads/?limit=1000";
+  while (url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch leads: ${response.status}`);
+    }
+    leads.push(...(await response.json()));
+    const cursor = response.headers.get("X-Next-Cursor");
+    url = cursor ? `/api/leads/?limit=1000&${cursor}` : null;
+  }
+  return leads;
+}
+
 export default function Dashboard({onOpen}) {
   const [leads, setLeads] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -16,8 +33,7 @@ export default function Dashboard({onOpen}) {
   const { scoringWeights, updateScoringWeights } = useScoringWeights();
   
   useEffect(()=> {
-    fetch("/api/leads")
-      .then(r=>r.json())
+    fetchAllLeads()
       .then(data => {
         setLeads(data);
         setLoading(false);
@@ -61,8 +77,7 @@ export default function Dashboard({onOpen}) {
 
   const refreshLeads = () => {
     setLoading(true);
-    fetch("/api/leads")
-      .then(r => r.json())
+    fetchAllLeads()
       .then(data => {
         setLeads(data);
         setLoading(false);
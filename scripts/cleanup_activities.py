@@ -8,6 +8,7 @@ import os
 import sys
 from datetime import datetime, timedelta
 from sqlmodel import Session, select, delete
+from sqlalchemy import func
 from app.database import engine
 from app.models import ActivityLog, Lead
 
@@ -22,33 +23,37 @@ def cleanup_old_activities(days_to_keep=7, dry_run=True):
     cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
     
     with Session(engine) as session:
-        # Get all activities older than cutoff date
-        old_activities = session.exec(
-            select(ActivityLog)
+        # Count activities older than cutoff date
+        old_count = session.exec(
+            select(func.count())
+            .select_from(ActivityLog)
             .where(ActivityLog.created_at < cutoff_date)
-        ).all()
+        ).one()
         
-        print(f"Found {len(old_activities)} activities older than {cutoff_date}")
+        print(f"Found {old_count} activities older than {cutoff_date}")
         
         if dry_run:
             print("\n=== DRY RUN - No activities will be deleted ===")
-            for activity in old_activities[:10]:  # Show first 10
+            preview = session.exec(
+                select(ActivityLog)
+                .where(ActivityLog.created_at < cutoff_date)
+                .limit(10)  # Show first 10
+            ).all()
+            for activity in preview:
                 print(f"  - Activity {activity.id}: {activity.action} on {activity.created_at}")
-            if len(old_activities) > 10:
-                print(f"  ... and {len(old_activities) - 10} more")
+            if old_count > 10:
+                print(f"  ... and {old_count - 10} more")
         else:
-            # Actually delete the old activities
-            deleted_count = 0
-            for activity in old_activities:
-                session.delete(activity)
-                deleted_count += 1
-            
+            # Actually delete the old activities in a single DELETE ... WHERE
+            result = session.exec(
+                delete(ActivityLog).where(ActivityLog.created_at < cutoff_date)
+            )
             session.commit()
-            print(f"\n✅ Deleted {deleted_count} old activities")
+            print(f"\n✅ Deleted {result.rowcount} old activities")
         
         # Show remaining activity count
-        remaining_activities = session.exec(select(ActivityLog)).all()
-        print(f"Remaining activities: {len(remaining_activities)}")
+        remaining_activities = session.exec(select(func.count()).select_from(ActivityLog)).one()
+        print(f"Remaining activities: {remaining_activities}")
 
 def cleanup_activities_by_lead(lead_id=None, keep_recent=5, dry_run=True):
     """
@@ -62,81 +67,94 @@ def cleanup_activities_by_lead(lead_id=None, keep_recent=5, dry_run=True):
     with Session(engine) as session:
         if lead_id:
             # Clean up activities for specific lead
-            activities = session.exec(
-                select(ActivityLog)
+            activity_count = session.exec(
+                select(func.count())
+                .select_from(ActivityLog)
                 .where(ActivityLog.lead_id == lead_id)
-                .order_by(ActivityLog.created_at.desc())
-            ).all()
+            ).one()
             
-            if len(activities) <= keep_recent:
-                print(f"Lead {lead_id} has only {len(activities)} activities, no cleanup needed")
+            if activity_count <= keep_recent:
+                print(f"Lead {lead_id} has only {activity_count} activities, no cleanup needed")
                 return
             
-            activities_to_delete = activities[keep_recent:]
-            print(f"Lead {lead_id}: Found {len(activities_to_delete)} old activities to delete")
+            delete_count = activity_count - keep_recent
+            print(f"Lead {lead_id}: Found {delete_count} old activities to delete")
             
+            # Everything past the keep_recent newest rows
+            stale = (
+                select(ActivityLog)
+                .where(ActivityLog.lead_id == lead_id)
+                .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+                .offset(keep_recent)
+            )
             if dry_run:
                 print(f"  Would keep {keep_recent} most recent activities")
-                for activity in activities_to_delete[:5]:
+                for activity in session.exec(stale.limit(5)).all():
                     print(f"  - Would delete: {activity.action} on {activity.created_at}")
             else:
-                for activity in activities_to_delete:
-                    session.delete(activity)
+                stale_ids = stale.with_only_columns(ActivityLog.id)
+                session.exec(delete(ActivityLog).where(ActivityLog.id.in_(stale_ids)))
                 session.commit()
-                print(f"✅ Deleted {len(activities_to_delete)} old activities for lead {lead_id}")
+                print(f"✅ Deleted {delete_count} old activities for lead {lead_id}")
+        elif not dry_run:
+            # Rank each lead's activities newest-first and delete everything
+            # past keep_recent with a single DELETE ... WHERE id IN (subquery)
+            ranked = select(
+                ActivityLog.id,
+                func.row_number().over(
+                    partition_by=ActivityLog.lead_id,
+                    order_by=(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+                ).label("rn")
+            ).subquery()
+            result = session.exec(
+                delete(ActivityLog).where(ActivityLog.id.in_(select(ranked.c.id).where(ranked.c.rn > keep_recent)))
+            )
+            session.commit()
+            print(f"✅ Deleted {result.rowcount} old activities across all leads")
         else:
-            # Clean up activities for all leads
-            leads = session.exec(select(Lead)).all()
+            # Report what would be cleaned up for all leads, counted per lead in SQL
+            counts = session.exec(
+                select(Lead.id, Lead.company, func.count(ActivityLog.id))
+                .join(ActivityLog, ActivityLog.lead_id == Lead.id)
+                .group_by(Lead.id, Lead.company)
+                .having(func.count(ActivityLog.id) > keep_recent)
+                .order_by(Lead.id)
+            ).all()
             total_deleted = 0
             
-            for lead in leads:
-                activities = session.exec(
-                    select(ActivityLog)
-                    .where(ActivityLog.lead_id == lead.id)
-                    .order_by(ActivityLog.created_at.desc())
-                ).all()
-                
-                if len(activities) <= keep_recent:
-                    continue
-                
-                activities_to_delete = activities[keep_recent:]
-                total_deleted += len(activities_to_delete)
-                
-                if dry_run:
-                    print(f"Lead {lead.id} ({lead.company}): {len(activities_to_delete)} old activities")
-                else:
-                    for activity in activities_to_delete:
-                        session.delete(activity)
+            for lead_id, company, activity_count in counts:
+                delete_count = activity_count - keep_recent
+                total_deleted += delete_count
+                print(f"Lead {lead_id} ({company}): {delete_count} old activities")
             
-            if not dry_run:
-                session.commit()
-                print(f"✅ Deleted {total_deleted} old activities across all leads")
-            else:
-                print(f"Would delete {total_deleted} old activities across all leads")
+            print(f"Would delete {total_deleted} old activities across all leads")
 
 def show_activity_summary():
     """Show a summary of current activities in the database."""
     with Session(engine) as session:
         # Get total activity count
-        total_activities = session.exec(select(ActivityLog)).all()
-        print(f"Total activities in database: {len(total_activities)}")
+        total_activities = session.exec(select(func.count()).select_from(ActivityLog)).one()
+        print(f"Total activities in database: {total_activities}")
         
-        # Get activities by lead
-        leads = session.exec(select(Lead)).all()
+        # Get activities by lead (outer join keeps leads with none)
+        per_lead = session.exec(
+            select(Lead.id, Lead.company, func.count(ActivityLog.id))
+            .outerjoin(ActivityLog, ActivityLog.lead_id == Lead.id)
+            .group_by(Lead.id, Lead.company)
+            .order_by(Lead.id)
+        ).all()
         print(f"\nActivities per lead:")
-        for lead in leads:
-            activities = session.exec(
-                select(ActivityLog).where(ActivityLog.lead_id == lead.id)
-            ).all()
-            print(f"  Lead {lead.id} ({lead.company}): {len(activities)} activities")
+        for lead_id, company, count in per_lead:
+            print(f"  Lead {lead_id} ({company}): {count} activities")
         
         # Get activities by type
         print(f"\nActivities by type:")
-        activity_types = {}
-        for activity in total_activities:
-            activity_types[activity.action] = activity_types.get(activity.action, 0) + 1
-        
-        for action, count in sorted(activity_types.items()):
+        by_type = session.exec(
+            select(ActivityLog.action, func.count())
+            .group_by(ActivityLog.action)
+            .order_by(ActivityLog.action)
+        ).all()
+        for action, count in by_type:
             print(f"  {action}: {count}")
 
 if __name__ == "__main__":
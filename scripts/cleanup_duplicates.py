@@ -1,27 +1,34 @@
 #!/usr/bin/env python3
 """
 Script to clean up duplicate leads in the database.
-This script removes duplicate leads based on company name and email combination.
+This script removes leads whose company names match case-insensitively
+(the key of the unique lower(company) index), keeping the most recent one.
+Restart the API afterwards so it can build the index.
 """
 
 import requests
 import json
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000"
+# Deletes are independent, so several run at once over pooled keep-alive connections
+MAX_WORKERS = 16
 
-def get_all_leads():
-    """Get all leads from the API"""
-    response = requests.get(f"{BASE_URL}/leads")
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS))
+
+def get_duplicate_groups():
+    """Get the groups of leads sharing a company name (grouped server-side)"""
+    response = _session.get(f"{BASE_URL}/leads/duplicates")
     if response.status_code == 200:
         return response.json()
     else:
-        print(f"Error fetching leads: {response.text}")
+        print(f"Error fetching duplicates: {response.text}")
         return []
 
 def delete_lead(lead_id):
     """Delete a lead by ID"""
-    response = requests.delete(f"{BASE_URL}/leads/{lead_id}")
+    response = _session.delete(f"{BASE_URL}/leads/{lead_id}")
     if response.status_code == 200:
         return True
     else:
@@ -30,54 +37,40 @@ def delete_lead(lead_id):
 
 def cleanup_duplicates():
     """Remove duplicate leads, keeping the most recent one"""
-    print("🔍 Fetching all leads...")
-    leads = get_all_leads()
-    
-    if not leads:
-        print("No leads found.")
-        return
-    
-    print(f"Found {len(leads)} leads total")
-    
-    # Group leads by company name and email combination
-    grouped_leads = defaultdict(list)
-    
-    for lead in leads:
-        # Use company name and email as the key for grouping
-        key = (lead['company'], lead.get('email', ''))
-        grouped_leads[key].append(lead)
+    print("🔍 Fetching duplicate groups...")
+    groups = get_duplicate_groups()
     
     duplicates_found = 0
     duplicates_removed = 0
+    ids_to_delete = []
     
-    print("\n🔍 Checking for duplicates...")
+    for group in groups:
+        # Leads come most recent first
+        lead_group = group['leads']
+        duplicates_found += len(lead_group) - 1  # All but one are duplicates
+        
+        print(f"\n📋 Found {len(lead_group)} duplicates for: {group['company']}")
+        
+        # Keep the most recent one, delete the rest
+        keep_lead = lead_group[0]
+        delete_leads = lead_group[1:]
+        
+        print(f"   ✅ Keeping lead ID {keep_lead['id']} ({keep_lead['company']}, {keep_lead['email'] or 'no email'}, created: {keep_lead['created_at']})")
+        
+        for lead in delete_leads:
+            print(f"   🗑️  Deleting lead ID {lead['id']} ({lead['company']}, {lead['email'] or 'no email'}, created: {lead['created_at']})")
+            ids_to_delete.append(lead['id'])
     
-    for key, lead_group in grouped_leads.items():
-        if len(lead_group) > 1:
-            company, email = key
-            duplicates_found += len(lead_group) - 1  # All but one are duplicates
-            
-            print(f"\n📋 Found {len(lead_group)} duplicates for: {company} ({email})")
-            
-            # Sort by created_at (most recent first)
-            lead_group.sort(key=lambda x: x['created_at'], reverse=True)
-            
-            # Keep the most recent one, delete the rest
-            keep_lead = lead_group[0]
-            delete_leads = lead_group[1:]
-            
-            print(f"   ✅ Keeping lead ID {keep_lead['id']} (created: {keep_lead['created_at']})")
-            
-            for lead in delete_leads:
-                print(f"   🗑️  Deleting lead ID {lead['id']} (created: {lead['created_at']})")
-                if delete_lead(lead['id']):
+    if ids_to_delete:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for lead_id, deleted in zip(ids_to_delete, executor.map(delete_lead, ids_to_delete)):
+                if deleted:
                     duplicates_removed += 1
                 else:
-                    print(f"   ❌ Failed to delete lead ID {lead['id']}")
+                    print(f"   ❌ Failed to delete lead ID {lead_id}")
     
     print(f"\n📊 Summary:")
-    print(f"   • Total leads found: {len(leads)}")
-    print(f"   • Duplicate groups found: {len([g for g in grouped_leads.values() if len(g) > 1])}")
+    print(f"   • Duplicate groups found: {len(groups)}")
     print(f"   • Duplicates found: {duplicates_found}")
     print(f"   • Duplicates removed: {duplicates_removed}")
     
@@ -6,124 +6,177 @@ Run this after starting the backend to populate with test data.
 
 import requests
 import json
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson comes with the backend requirements; stdlib json otherwise
+    orjson = None
 
 BASE_URL = "http://localhost:8000"
+# Trailing slash matches the route exactly (no 307 redirect round trip)
+LEADS_URL = f"{BASE_URL}/leads/"
+BULK_LEADS_URL = f"{BASE_URL}/leads/bulk"
+JSON_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
 
-def get_existing_leads():
-    """Get all existing leads to check for duplicates"""
-    response = requests.get(f"{BASE_URL}/leads")
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error fetching existing leads: {response.text}")
-        return []
+def _dumps(obj):
+    """Encode obj as JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
 
-def lead_exists(lead_data, existing_leads):
-    """Check if a lead already exists based on company and email"""
-    for existing_lead in existing_leads:
-        if (existing_lead['company'] == lead_data['company'] and 
-            existing_lead.get('email') == lead_data.get('email')):
-            return True
-    return False
+def _loads(data):
+    """Decode JSON from bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-def create_lead(lead_data, existing_leads):
-    """Create a lead via the API if it doesn't already exist"""
-    if lead_exists(lead_data, existing_leads):
-        print(f"⚠️  Lead already exists: {lead_data['company']} ({lead_data.get('email', 'no email')})")
-        return None
-    
-    response = requests.post(f"{BASE_URL}/leads", json=lead_data)
+# One keep-alive connection pool for every call the script makes. Instead of
+# pacing requests with sleeps, back off only when the server says so (429/5xx,
+# honouring Retry-After); creates are safe to retry since existing companies
+# are skipped (or rejected) server-side
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.2,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+))
+_session.headers.update(JSON_HEADERS)
+
+def add_known_lead(lead_data, emails_by_company):
+    """Record a lead's company and email in the company -> emails lookup"""
+    emails_by_company.setdefault(lead_data['company'], set()).add(lead_data.get('email'))
+
+def is_known_lead(lead_data, emails_by_company):
+    """Check a lead's company and email against the company -> emails lookup"""
+    return lead_data.get('email') in emails_by_company.get(lead_data['company'], ())
+
+def create_lead(lead_data):
+    """Create a single lead via the API"""
+    response = _session.post(LEADS_URL, data=_dumps(lead_data))
     if response.status_code == 200:
-        return response.json()
+        return _loads(response.content)
+    elif response.status_code == 409:
+        print(f"⚠️  Lead already exists: {lead_data['company']}")
+        return None
     else:
         print(f"Error creating lead {lead_data['company']}: {response.text}")
         return None
 
-def main():
-    """Seed the database with sample leads"""
+def create_leads(leads_data):
+    """Create leads with a single bulk API call.
+
+    Repeats within leads_data are dropped here; leads that already exist in
+    the database are skipped by the server (one lead per company, enforced by
+    a unique index) and reported here.
+    """
+    emails_by_company = {}
+    new_leads = []
+    for lead_data in leads_data:
+        if is_known_lead(lead_data, emails_by_company):
+            print(f"⚠️  Duplicate sample lead skipped: {lead_data['company']} ({lead_data.get('email', 'no email')})")
+        else:
+            add_known_lead(lead_data, emails_by_company)
+            new_leads.append(lead_data)
+    if not new_leads:
+        return []
     
-    sample_leads = [
-        {
-            "company": "Acme AI",
-            "name": "Jordan Smith",
-            "title": "Head of Product",
-            "email": "jordan@acme.ai",
-            "website": "https://acme.ai",
-            "company_metadata": {
-                "company_size": 15,
-                "industry": "SaaS",
-                "recent_funding": "seed",
-                "tech_stack": ["Python", "React", "AWS"]
-            }
-        },
-        {
-            "company": "MegaCorp Inc",
-            "name": "Taylor Lee",
-            "title": "VP Sales",
-            "email": "taylor.lee@megacorp.com",
-            "website": "https://megacorp.com",
-            "company_metadata": {
-                "company_size": 5000,
-                "industry": "Finance",
-                "recent_funding": None,
-                "annual_revenue": "500M"
-            }
-        },
-        {
-            "company": "TechFlow Solutions",
-            "name": "Alex Chen",
-            "title": "CTO",
-            "email": "alex@techflow.com",
-            "website": "https://techflow.com",
-            "company_metadata": {
-                "company_size": 150,
-                "industry": "Technology",
-                "recent_funding": "Series A",
-                "tech_stack": ["Node.js", "MongoDB", "Docker"]
-            }
-        },
-        {
-            "company": "StartupXYZ",
-            "name": "Maria Rodriguez",
-            "title": "Founder & CEO",
-            "email": "maria@startupxyz.com",
-            "website": "https://startupxyz.com",
-            "company_metadata": {
-                "company_size": 8,
-                "industry": "E-commerce",
-                "recent_funding": "pre-seed",
-                "founded": "2023"
-            }
-        },
-        {
-            "company": "Enterprise Solutions Ltd",
-            "name": "David Kim",
-            "title": "Director of Operations",
-            "email": "david.kim@enterprise-solutions.com",
-            "website": "https://enterprise-solutions.com",
-            "company_metadata": {
-                "company_size": 2000,
-                "industry": "Manufacturing",
-                "recent_funding": None,
-                "annual_revenue": "200M"
-            }
+    response = _session.post(BULK_LEADS_URL, data=_dumps(new_leads))
+    if response.status_code in (404, 405):
+        # Backend without the bulk endpoint: create the leads one at a time
+        return [lead for lead in map(create_lead, new_leads) if lead]
+    if response.status_code != 200:
+        print(f"Error creating leads: {response.text}")
+        return []
+    result = _loads(response.content)
+    for company in result["skipped"]:
+        print(f"⚠️  Lead already exists: {company}")
+    return result["created"]
+
+# Built once at import; main() only reads it
+SAMPLE_LEADS = (
+    {
+        "company": "Acme AI",
+        "name": "Jordan Smith",
+        "title": "Head of Product",
+        "email": "jordan@acme.ai",
+        "website": "https://acme.ai",
+        "company_metadata": {
+            "company_size": 15,
+            "industry": "SaaS",
+            "recent_funding": "seed",
+            "tech_stack": ["Python", "React", "AWS"]
         }
-    ]
-    
+    },
+    {
+        "company": "MegaCorp Inc",
+        "name": "Taylor Lee",
+        "title": "VP Sales",
+        "email": "taylor.lee@megacorp.com",
+        "website": "https://megacorp.com",
+        "company_metadata": {
+            "company_size": 5000,
+            "industry": "Finance",
+            "recent_funding": None,
+            "annual_revenue": "500M"
+        }
+    },
+    {
+        "company": "TechFlow Solutions",
+        "name": "Alex Chen",
+        "title": "CTO",
+        "email": "alex@techflow.com",
+        "website": "https://techflow.com",
+        "company_metadata": {
+            "company_size": 150,
+            "industry": "Technology",
+            "recent_funding": "Series A",
+            "tech_stack": ["Node.js", "MongoDB", "Docker"]
+        }
+    },
+    {
+        "company": "StartupXYZ",
+        "name": "Maria Rodriguez",
+        "title": "Founder & CEO",
+        "email": "maria@startupxyz.com",
+        "website": "https://startupxyz.com",
+        "company_metadata": {
+            "company_size": 8,
+            "industry": "E-commerce",
+            "recent_funding": "pre-seed",
+            "founded": "2023"
+        }
+    },
+    {
+        "company": "Enterprise Solutions Ltd",
+        "name": "David Kim",
+        "title": "Director of Operations",
+        "email": "david.kim@enterprise-solutions.com",
+        "website": "https://enterprise-solutions.com",
+        "company_metadata": {
+            "company_size": 2000,
+            "industry": "Manufacturing",
+            "recent_funding": None,
+            "annual_revenue": "200M"
+        }
+    }
+)
+
+def main():
+    """Seed the database with sample leads"""
     print("🌱 Seeding database with sample leads...")
     
-    # Get existing leads to avoid duplicates
-    existing_leads = get_existing_leads()
-    print(f"📋 Found {len(existing_leads)} existing leads")
-    
-    created_leads = []
-    for lead_data in sample_leads:
-        lead = create_lead(lead_data, existing_leads)
-        if lead:
-            created_leads.append(lead)
-            print(f"✅ Created lead: {lead_data['company']} ({lead['id']})")
-        time.sleep(0.5)  # Small delay to avoid overwhelming the API
+    created_leads = create_leads(SAMPLE_LEADS)
+    for lead in created_leads:
+        print(f"✅ Created lead: {lead['company']} ({lead['id']})")
     
     print(f"\n🎉 Successfully created {len(created_leads)} leads!")
     print("\nYou can now:")